@@ -0,0 +1,107 @@
+from core.api.cache import INVALIDATED, LocalLRUCache, ResponseDataCache, fill_entry, invalidate_entries
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# The serialized details and profile of the users, read far more often than the users change
+user_details_cache = ResponseDataCache(namespace="accounts:user-details")
+user_profile_cache = ResponseDataCache(namespace="accounts:user-profile")
+
+
+class AuthenticatedUserCache:
+    """
+    Cache of the users loaded by the authentication of the requests, by id.
+
+    The users are looked up in an in-process LRU first, then in the shared cache, so authenticating a
+    request normally costs no query. The entries are dropped from the shared cache and from the LRU of the
+    current process on every change of the users (see `invalidate_user_caches`), the LRUs of the other
+    processes keep their entries until `AUTH_USER_LOCAL_CACHE_TIMEOUT`.
+
+    Only the `fields` read by the authentication and the permissions are cached, never the password: the hash
+    of the password signed in the tokens (`REVOKE_TOKEN_CLAIM`) is kept instead. A user is rebuilt from its entry
+    with its other fields deferred, they are loaded from the database on first access.
+
+    Usage Example:
+        ```python
+        entry = authenticated_user_cache.get(user_id)
+        if entry is None:
+            user = User.objects.get(pk=user_id)
+            authenticated_user_cache.set(user)
+        else:
+            user = authenticated_user_cache.get_user(entry)
+        ```
+    """
+
+    fields = ("id", "email", "type", "is_active", "is_staff", "is_superuser")
+
+    def __init__(self, namespace: str, alias: str = "default"):
+        self.namespace = namespace
+        self.alias = alias
+        self.timeout = settings.AUTH_USER_CACHE_TIMEOUT
+        self.local_cache = LocalLRUCache(
+            max_size=settings.AUTH_USER_LOCAL_CACHE_SIZE,
+            timeout=settings.AUTH_USER_LOCAL_CACHE_TIMEOUT,
+        )
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get_key(self, pk) -> str:
+        return f"{self.namespace}:{pk}"
+
+    def get(self, pk) -> dict | None:
+        """Get the cached entry of the user, its `fields` and its `password_hash`, None on a miss"""
+        key = self.get_key(pk)
+
+        entry = self.local_cache.get(key)
+        if entry is None:
+            entry = self.cache.get(key)
+            if entry is None or entry == INVALIDATED:
+                return None
+            self.local_cache.set(key, entry)
+
+        return entry
+
+    def get_user(self, entry: dict):
+        """Build the user of the entry, every request gets its own instance"""
+        User = get_user_model()
+        # The values are given in the order of the columns of the model
+        field_names = [field.attname for field in User._meta.concrete_fields if field.attname in entry["fields"]]
+        return User.from_db(DEFAULT_DB_ALIAS, field_names, [entry["fields"][name] for name in field_names])
+
+    def set(self, user) -> None:
+        key = self.get_key(user.pk)
+        entry = {
+            "fields": {field: getattr(user, field) for field in self.fields},
+            "password_hash": get_md5_hash_password(user.password),
+        }
+        if fill_entry(self.cache, key, entry, self.timeout):
+            self.local_cache.set(key, entry)
+
+    def invalidate(self, *pks) -> None:
+        keys = [self.get_key(pk) for pk in pks]
+        self.local_cache.delete(*keys)
+        invalidate_entries(self.cache, keys)
+
+
+authenticated_user_cache = AuthenticatedUserCache(namespace="accounts:authenticated-user")
+
+
+def invalidate_user_caches(*user_ids) -> None:
+    """
+    Drop the cached details, profile and authenticated instance of the users.
+
+    The entries are dropped right away and once again after the commit, so a concurrent request
+    reading the previous state before the commit can not keep it cached.
+    """
+
+    def invalidate():
+        user_details_cache.invalidate(*user_ids)
+        user_profile_cache.invalidate(*user_ids)
+        authenticated_user_cache.invalidate(*user_ids)
+
+    invalidate()
+    transaction.on_commit(invalidate)
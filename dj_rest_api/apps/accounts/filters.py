@@ -1,20 +1,26 @@
 import django_filters.rest_framework as filters
 from apps.accounts.models import User
+from core.api.filters import SearchFilter
 
 
 class UserFilter(filters.FilterSet):
     """A FilterSet subclass for filtering User model instances.
 
     This class defines the fields and lookup expressions that can be used to filter
-    the User queryset by email and verification status.
+    the User queryset by email, names and verification status.
+    The `search` parameter looks for its terms in the email and the names at once.
 
     Attributes:
         Meta: A class that contains the model and fields information for the FilterSet.
     """
 
+    search = SearchFilter(search_fields=["email", "first_name", "last_name"])
+
     class Meta:
         model = User
         fields = {
             "email": ["icontains"],
+            "first_name": ["icontains"],
+            "last_name": ["icontains"],
             "is_verified": ["exact"],
         }
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:05
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# The substring lookups compile to `UPPER("column"::text) LIKE UPPER(...)` on PostgreSQL
+TRIGRAM_INDEXED_COLUMNS = ["email", "first_name", "last_name"]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Create the trigram GIN indexes of the user search, only PostgreSQL supports them"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for column in TRIGRAM_INDEXED_COLUMNS:
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS accounts_user_{column}_trgm_idx "
+            f'ON accounts_user USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for column in TRIGRAM_INDEXED_COLUMNS:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS accounts_user_{column}_trgm_idx")
+
+
+class Migration(migrations.Migration):
+    # The indexes are built concurrently to not lock the users table, which is not allowed in a transaction
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0002_user_joined_id_index"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
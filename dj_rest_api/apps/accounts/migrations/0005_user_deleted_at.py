@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:05
+
+import apps.accounts.models.managers
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0004_updated_at"),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name="user",
+            managers=[
+                ("objects", apps.accounts.models.managers.CustomUserManager()),
+                ("all_objects", apps.accounts.models.managers.CustomUserManager(include_deleted=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name="deleted at"),
+        ),
+    ]
@@ -2,15 +2,28 @@
 This file contains custom users manager classes
 """
 
-from django.contrib.auth.hashers import make_password
+from core import passwords
 from django.contrib.auth.models import UserManager
 
 
 class CustomUserManager(UserManager):
     """
     Creates and saves a User with the given email and password.
+
+    The soft deleted users are hidden, unless the manager is created with `include_deleted=True`.
     """
 
+    def __init__(self, include_deleted: bool = False):
+        self.include_deleted = include_deleted
+        super().__init__()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.include_deleted:
+            return queryset
+
+        return queryset.filter(deleted_at__isnull=True)
+
     def _create_user(self, email, password, **extra_fields):
         """Create and save a User with the given email and password."""
         if not email or len(email) <= 0:
@@ -18,7 +31,8 @@ class CustomUserManager(UserManager):
 
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
-        user.password = make_password(password)
+        # Hashed in the pool of processes, off the request thread
+        user.password = passwords.make_password(password)
         user.save(using=self._db)
         return user
 
@@ -1,12 +1,14 @@
 import functools
 
 from django.db import transaction
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
+from ..caches import invalidate_user_caches
 from ..tasks import send_account_created_email, send_account_verification_email
-from . import Admin, AdminProfile, Student, StudentProfile, Teacher, TeacherProfile
-from .signals import user_proxy_model_instance_saved
+from . import Admin, AdminProfile, Student, StudentProfile, Teacher, TeacherProfile, User
+from .signals import user_proxy_model_instance_saved, users_bulk_updated
 
 # @receiver(post_save, sender=models.Teacher)
 # def assign_group(sender, instance, **kwargs):
@@ -69,6 +71,78 @@ def create_teacher_profile(sender, instance, created, **kwargs):
         TeacherProfile.objects.create(teacher=instance)
 
 
+@receiver(post_save, sender=User, dispatch_uid="user_post_save_cache")
+@receiver(post_delete, sender=User, dispatch_uid="user_post_delete_cache")
+@receiver(post_save, sender=Admin, dispatch_uid="admin_post_save_cache")
+@receiver(post_delete, sender=Admin, dispatch_uid="admin_post_delete_cache")
+@receiver(post_save, sender=Student, dispatch_uid="student_post_save_cache")
+@receiver(post_delete, sender=Student, dispatch_uid="student_post_delete_cache")
+@receiver(post_save, sender=Teacher, dispatch_uid="teacher_post_save_cache")
+@receiver(post_delete, sender=Teacher, dispatch_uid="teacher_post_delete_cache")
+def invalidate_user_caches_receiver(sender, instance, **kwargs):
+    """Drop the cached representations of the saved or deleted user"""
+    invalidate_user_caches(instance.pk)
+
+
+@receiver(post_save, sender=AdminProfile, dispatch_uid="admin_profile_post_save_cache")
+@receiver(post_delete, sender=AdminProfile, dispatch_uid="admin_profile_post_delete_cache")
+@receiver(post_save, sender=StudentProfile, dispatch_uid="student_profile_post_save_cache")
+@receiver(post_delete, sender=StudentProfile, dispatch_uid="student_profile_post_delete_cache")
+@receiver(post_save, sender=TeacherProfile, dispatch_uid="teacher_profile_post_save_cache")
+@receiver(post_delete, sender=TeacherProfile, dispatch_uid="teacher_profile_post_delete_cache")
+def invalidate_profile_user_caches_receiver(sender, instance, **kwargs):
+    """Drop the cached representations of the user owning the saved or deleted profile"""
+    user_id_fields = {AdminProfile: "admin_id", StudentProfile: "student_id", TeacherProfile: "teacher_id"}
+
+    user_id = getattr(instance, user_id_fields[sender])
+    if user_id:
+        invalidate_user_caches(user_id)
+
+
+def touch_users(*user_ids) -> None:
+    """
+    Bump the `updated_at` stamp of the users whose representation changed without them being saved
+    (e.g. their groups, or the email of their manager), so their version changes with it.
+    """
+    if not user_ids:
+        return
+
+    User._base_manager.filter(pk__in=user_ids).update(updated_at=timezone.now())
+    invalidate_user_caches(*user_ids)
+
+
+@receiver(m2m_changed, sender=User.groups.through, dispatch_uid="user_groups_changed_cache")
+def touch_user_groups_receiver(sender, instance, action, reverse, pk_set, **kwargs):
+    """Touch the users whose groups have changed"""
+    if reverse and action == "pre_clear":
+        # The users of a cleared group are not known anymore once it is cleared
+        user_ids = list(instance.user_set.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove") or (action == "post_clear" and not reverse):
+        user_ids = (pk_set or []) if reverse else [instance.pk]
+    else:
+        return
+
+    touch_users(*user_ids)
+
+
+@receiver(post_save, sender=User, dispatch_uid="user_post_save_managed_users")
+@receiver(post_save, sender=Admin, dispatch_uid="admin_post_save_managed_users")
+@receiver(pre_delete, sender=User, dispatch_uid="user_pre_delete_managed_users")
+@receiver(pre_delete, sender=Admin, dispatch_uid="admin_pre_delete_managed_users")
+def touch_managed_users_receiver(sender, instance, created=False, update_fields=None, **kwargs):
+    """Touch the users rendering the email of the saved or deleted admin as their manager"""
+    if created or instance.type != User.Type.ADMIN or (update_fields is not None and "email" not in update_fields):
+        return
+
+    touch_users(*User._base_manager.filter(manager_id=instance.pk).values_list("pk", flat=True))
+
+
+@receiver(users_bulk_updated, sender=User, dispatch_uid="users_bulk_updated_cache")
+def invalidate_bulk_updated_users_caches_receiver(sender, user_ids, **kwargs):
+    """Drop the cached representations of the users updated in bulk"""
+    invalidate_user_caches(*user_ids)
+
+
 def signal_reconnect(signal, sender, receiver, dispatch_uid):
     """
     Decorator to temporarily disconnect a Django signal, execute the decorated function,
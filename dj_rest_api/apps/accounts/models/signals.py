@@ -1,3 +1,6 @@
 from django.dispatch import Signal
 
 user_proxy_model_instance_saved = Signal()
+
+# Sent with the `user_ids` of the users changed by a queryset `update()`, which sends no `post_save`
+users_bulk_updated = Signal()
@@ -13,12 +13,21 @@ from .validators import validate_name
 
 class User(AbstractUser):
     objects = CustomUserManager()
+    # Including the soft deleted users, waiting to be purged
+    all_objects = CustomUserManager(include_deleted=True)
 
     class Type(models.TextChoices):
         STUDENT = "student", _("Student")
         TEACHER = "teacher", _("Teacher")
         ADMIN = "admin", _("Admin")
 
+    # The reverse relation holding the profile of every user type
+    PROFILE_RELATIONS = {
+        Type.ADMIN: "admin_profile",
+        Type.TEACHER: "teacher_profile",
+        Type.STUDENT: "student_profile",
+    }
+
     # Set username to none
     username = None
 
@@ -38,9 +47,17 @@ class User(AbstractUser):
     type = models.CharField(_("user type"), max_length=50, choices=Type.choices, blank=True, default=Type.ADMIN)
     is_verified = models.BooleanField(_("verified"), default=False)
     is_password_changed = models.BooleanField(_("is_password_changed"), default=False)
+    updated_at = models.DateTimeField(_("updated at"), auto_now=True)
+    deleted_at = models.DateTimeField(_("deleted at"), null=True, blank=True, db_index=True)
 
     manager = models.ForeignKey("Admin", on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Supports the keyset pagination of the users list
+            models.Index(fields=["date_joined", "id"], name="accounts_user_joined_id_idx"),
+        ]
+
     def __str__(self) -> str:
         return self.email
 
@@ -98,6 +115,7 @@ class AdminProfile(models.Model):
         null=True,
     )
     section = models.CharField(_("section"), max_length=50)
+    updated_at = models.DateTimeField(_("updated at"), auto_now=True)
 
 
 class StudentProfile(models.Model):
@@ -110,6 +128,7 @@ class StudentProfile(models.Model):
     )
 
     study_hours = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(_("updated at"), auto_now=True)
 
 
 class TeacherProfile(models.Model):
@@ -123,3 +142,4 @@ class TeacherProfile(models.Model):
 
     num_courses = models.IntegerField(default=0)
     is_idle = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(_("updated at"), auto_now=True)
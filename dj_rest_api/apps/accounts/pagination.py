@@ -0,0 +1,17 @@
+from core.api.counts import EstimatedCount
+from core.api.pagination import KeysetCursorPagination
+
+from . import responses
+
+
+class UserCursorPagination(KeysetCursorPagination):
+    """
+    Cursor pagination of the users list.
+
+    Pages are sought over `(date_joined, id)`, which is covered by the `accounts_user_joined_id_idx` index.
+    The total of users is estimated by the planner instead of counting the whole table on every page.
+    """
+
+    ordering = ("date_joined", "id")
+    count_strategy = EstimatedCount(threshold=1000)
+    response_class = responses.UserListPaginatedAPIResponse
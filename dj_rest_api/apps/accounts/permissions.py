@@ -11,6 +11,10 @@ class UserListCreatePermission(BasePermission):
         return super().has_permission(request, view)  # for others, check user against permissions
 
 
+class UserBulkPermission(BasePermission):
+    """Unlike the sign up of one user, creating or updating users in bulk requires the model permissions"""
+
+
 class UserDetailsUpdateDestroyPermission(BasePermission):
     def has_object_permission(self, request, view, obj):
         user = request.user
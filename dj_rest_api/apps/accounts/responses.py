@@ -1,7 +1,7 @@
 import enum
 from typing import Any, Optional, T
 
-from core.api.responses import BaseAPIResponse
+from core.api.responses import BaseAPIResponse, PaginatedAPIResponse, StreamingAPIResponse
 from core.api.responses import OperationCode as BaseOperationCode
 from django.utils.translation import gettext_lazy as _
 from rest_framework import status
@@ -25,6 +25,37 @@ class UserListAPIResponse(BaseAPIResponse):
         return super().format_data(data)
 
 
+class UserBatchAPIResponse(BaseAPIResponse):
+    default_status = status.HTTP_200_OK
+
+    def format_data(self, data: list | None = None) -> T:
+        found = sum("error" not in user for user in data)
+        return {
+            "code": BaseOperationCode.Listing.value,
+            "detail": _(f"{found} of {len(data)} users have been found"),
+            "data": data,
+        }
+
+
+class UserListPaginatedAPIResponse(PaginatedAPIResponse):
+    default_status = status.HTTP_200_OK
+
+    def format_data(self, data: list | None = None) -> T:
+        formatted_data = super().format_data(data)
+        formatted_data["detail"] = _(f"{self.get_count(data)} users have been found")
+        return formatted_data
+
+
+class UserListStreamingAPIResponse(StreamingAPIResponse):
+    default_status = status.HTTP_200_OK
+
+    def format_data(self) -> dict:
+        return {
+            "code": BaseOperationCode.Listing.value,
+            "detail": _("The users are being streamed"),
+        }
+
+
 class UserCreatedAPIResponse(BaseAPIResponse):
     default_status = status.HTTP_201_CREATED
 
@@ -35,6 +66,29 @@ class UserCreatedAPIResponse(BaseAPIResponse):
         }
 
 
+class UserBulkCreatedAPIResponse(BaseAPIResponse):
+    default_status = status.HTTP_201_CREATED
+
+    def format_data(self, data: list | None = None) -> T:
+        return {
+            "code": BaseOperationCode.Created.value,
+            "detail": _(f"{len(data)} users have been created"),
+            "data": data,
+        }
+
+
+class UserBulkUpdateAPIResponse(BaseAPIResponse):
+    default_status = status.HTTP_200_OK
+
+    def format_data(self, data: list | None = None) -> T:
+        updated = sum("error" not in user for user in data)
+        return {
+            "code": BaseOperationCode.Updated.value,
+            "detail": _(f"{updated} of {len(data)} users have been updated"),
+            "data": data,
+        }
+
+
 class UserUpdateAPIResponse(BaseAPIResponse):
     default_status = status.HTTP_200_OK
 
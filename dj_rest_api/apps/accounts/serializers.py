@@ -1,11 +1,16 @@
 from apps.accounts import models as accounts_models
+from apps.accounts import services as accounts_services
 from apps.authentication.services import validate_access_token
-from core.api.serializers import BaseModelSerializer, BaseSerializer
+from core.api import exceptions as core_exceptions
+from core.api.serializers import BaseModelSerializer, BaseSerializer, TemplatedHyperlinkedIdentityField
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.contrib.auth.password_validation import validate_password
+from django.db.models import Manager
 from rest_framework import serializers
 from rest_framework.utils.serializer_helpers import ReturnDict
+from rest_framework.validators import UniqueValidator
 
 from . import exceptions
 
@@ -34,10 +39,31 @@ class StudentProfileSerializer(BaseModelSerializer):
         ]
 
 
+PROFILE_SERIALIZERS = {
+    accounts_models.User.Type.ADMIN: AdminProfileSerializer,
+    accounts_models.User.Type.TEACHER: TeacherProfileSerializer,
+    accounts_models.User.Type.STUDENT: StudentProfileSerializer,
+}
+
+
+def get_profile_serializer(user_type: str) -> type[BaseModelSerializer] | None:
+    """Get the serializer of the profile of the given user type"""
+    return PROFILE_SERIALIZERS.get(user_type.lower())
+
+
+class UserDetailsListSerializer(serializers.ListSerializer):
+    """List serializer loading the profiles of all the users at once, one query per user type"""
+
+    def to_representation(self, data):
+        users = list(data.all() if isinstance(data, Manager) else data)
+        accounts_services.prefetch_user_profiles(users)
+        return super().to_representation(users)
+
+
 class UserListSerializer(BaseModelSerializer):
     """Serializer for listing user details."""
 
-    url = serializers.HyperlinkedIdentityField(
+    url = TemplatedHyperlinkedIdentityField(
         view_name="api:accounts-api:user-details-update-destroy",
         lookup_field="id",
         read_only=True,
@@ -48,12 +74,12 @@ class UserListSerializer(BaseModelSerializer):
     # Use SlugRelatedField for only accepting the name of the group (No need for other info)
     groups = serializers.SlugRelatedField(
         queryset=Group.objects.all(),
-        many=False,
+        many=True,
         slug_field="name",
         allow_null=True,
     )
 
-    profile = serializers.HyperlinkedIdentityField(
+    profile = TemplatedHyperlinkedIdentityField(
         view_name="api:accounts-api:profile-details-update",
         lookup_field="id",
         read_only=True,
@@ -78,6 +104,13 @@ class UserListSerializer(BaseModelSerializer):
             "profile",
         ]
 
+        # Read the listed users as `.values()` rows instead of model instances
+        projection = True
+
+        # Load the manager and the groups of all the listed users at once (rendering of instances)
+        select_related = ["manager"]
+        prefetch_related = ["groups"]
+
 
 class UserDetailsSerializer(BaseModelSerializer):
     """An abstract serializer for managing User model"""
@@ -108,21 +141,78 @@ class UserDetailsSerializer(BaseModelSerializer):
             "profile",
         ]
 
+        # A retrieved user is joined with its profile, whatever its type
+        select_related = list(accounts_models.User.PROFILE_RELATIONS.values())
+        # Many users load their profiles with one query per user type
+        list_serializer_class = UserDetailsListSerializer
+
     def get_profile(self, obj):
         """Get the appropriate profile data for different user type"""
-        profiles_serializers = {
-            "admin": AdminProfileSerializer(
-                instance=accounts_models.AdminProfile.objects.filter(admin=obj.id).first()
-            ),
-            "teacher": TeacherProfileSerializer(
-                instance=accounts_models.TeacherProfile.objects.filter(teacher=obj.id).first()
-            ),
-            "student": StudentProfileSerializer(
-                instance=accounts_models.StudentProfile.objects.filter(student=obj.id).first()
-            ),
-        }
-        serializer = profiles_serializers.get(obj.type.lower(), None)
-        return serializer.data
+        serializer_class = get_profile_serializer(user_type=obj.type)
+        if serializer_class is None:
+            return None
+
+        return serializer_class(instance=accounts_services.get_user_profile(obj)).data
+
+
+class UserBulkCreateListSerializer(serializers.ListSerializer):
+    """
+    Validate many new users at once.
+
+    The uniqueness of the emails is checked for the whole batch with one `email__in` query,
+    instead of one query per user by the `UniqueValidator` of the email field.
+    Every row must have a `type`, a row can not be created as an admin by leaving it out.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("max_length", settings.USERS_BULK_CREATE_MAX_SIZE)
+        kwargs.setdefault("allow_empty", False)
+        super().__init__(*args, **kwargs)
+
+        email_field = self.child.fields["email"]
+        email_field.validators = [
+            validator for validator in email_field.validators if not isinstance(validator, UniqueValidator)
+        ]
+
+        type_field = self.child.fields["type"]
+        type_field.required, type_field.allow_blank = True, False
+
+    def validate(self, attrs):
+        User = accounts_models.User
+
+        emails = [User.objects.normalize_email(row["email"]) for row in attrs]
+
+        duplicated_emails = {email for email in emails if emails.count(email) > 1}
+        if duplicated_emails:
+            raise serializers.ValidationError(
+                {"email": [f"{email} is duplicated" for email in sorted(duplicated_emails)]}
+            )
+
+        # The emails of the soft deleted users are taken until they are purged
+        existing_emails = User.all_objects.filter(email__in=emails).values_list("email", flat=True)
+        if existing_emails:
+            raise serializers.ValidationError(
+                {"email": [f"{email} already exists" for email in sorted(existing_emails)]}
+            )
+
+        return attrs
+
+    def is_valid(self, *, raise_exception=False):
+        """Override is_valid method to raise custom exceptions"""
+        valid = super().is_valid()
+
+        # Raise Field Error exception
+        if not valid and raise_exception:
+            errors = self.errors
+            if isinstance(errors, list):
+                # The errors of the rows are listed by row, they are reported by the index of the row
+                errors = {
+                    f"{index}.{field}": error for index, row in enumerate(errors) for field, error in row.items()
+                }
+
+            raise core_exceptions.SerializerFieldsAPIException(detail=errors)
+
+        return valid
 
 
 class UserCreateSerializer(BaseModelSerializer):
@@ -148,6 +238,18 @@ class UserCreateSerializer(BaseModelSerializer):
             "identification",
             "type",
         ]
+        list_serializer_class = UserBulkCreateListSerializer
+        extra_kwargs = {
+            # The emails of the soft deleted users are taken until they are purged
+            "email": {
+                "validators": [
+                    UniqueValidator(
+                        queryset=accounts_models.User.all_objects.all(),
+                        message="user with this email address already exists.",
+                    )
+                ]
+            },
+        }
 
     @property
     def data(self):
@@ -269,6 +371,69 @@ class StudentUserUpdateSerializer(UserUpdateSerializer):
         profile_serializer = StudentProfileSerializer
 
 
+class UserBulkUpdateChangesSerializer(BaseModelSerializer):
+    """Validate one change-set applied to many users at once, only the listed fields can be changed in bulk"""
+
+    class Meta:
+        model = accounts_models.User
+
+        fields = [
+            "is_active",
+            "is_verified",
+            "manager",
+            "first_name",
+            "last_name",
+            "phone_number",
+            "state",
+            "city",
+            "street",
+            "zipcode",
+            "identification",
+        ]
+
+    def to_internal_value(self, data):
+        unknown_fields = sorted(set(data) - set(self.fields))
+        if unknown_fields:
+            raise serializers.ValidationError(
+                {field: ["This field can not be updated in bulk."] for field in unknown_fields}
+            )
+
+        return super().to_internal_value(data)
+
+
+class UserBulkUpdateItemSerializer(BaseSerializer):
+    id = serializers.UUIDField()
+    changes = serializers.DictField(allow_empty=False)
+
+
+class UserBulkUpdateSerializer(BaseSerializer):
+    """
+    Validate the shape of a bulk update, the change-sets themselves are validated by `UserBulkUpdateChangesSerializer`.
+
+    Either every user gets its own changes with `{"users": [{"id": <id>, "changes": {...}}]}`,
+    or the users matching a filter get the same changes with `{"filter": {...}, "changes": {...}}`.
+    """
+
+    users = serializers.ListField(
+        child=UserBulkUpdateItemSerializer(),
+        required=False,
+        min_length=1,
+        max_length=settings.USERS_BULK_UPDATE_MAX_SIZE,
+    )
+    filter = serializers.DictField(required=False, allow_empty=False)
+    changes = serializers.DictField(required=False, allow_empty=False)
+
+    def validate(self, attrs):
+        if ("users" in attrs) == ("filter" in attrs) or ("filter" in attrs) != ("changes" in attrs):
+            raise serializers.ValidationError("Send either `users`, or `filter` with `changes`.")
+
+        user_ids = [user["id"] for user in attrs.get("users", [])]
+        if len(user_ids) != len(set(user_ids)):
+            raise serializers.ValidationError({"users": ["Every user can only be listed once."]})
+
+        return attrs
+
+
 class AccountVerificationSerializer(BaseSerializer):
     token = serializers.CharField()
 
@@ -276,3 +441,21 @@ class AccountVerificationSerializer(BaseSerializer):
         validate_access_token(token=attrs.get("token"))
 
         return attrs
+
+
+class UserBatchRetrieveSerializer(BaseSerializer):
+    """Validate the ids of a batch retrieval, given as `?ids=<id>,<id>` or as repeated `?ids=<id>`"""
+
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        min_length=1,
+        max_length=settings.USERS_BATCH_MAX_SIZE,
+    )
+
+    def to_internal_value(self, data):
+        ids = [user_id.strip() for value in data.getlist("ids") for user_id in value.split(",") if user_id.strip()]
+        return super().to_internal_value({"ids": ids})
+
+    def validate_ids(self, value):
+        # The duplicated ids are answered once, in the order of their first occurrence
+        return list(dict.fromkeys(value))
@@ -1,10 +1,18 @@
+from collections import defaultdict
 from typing import Any
 
 from apps.accounts import models as accounts_models
+from apps.accounts import tasks as accounts_tasks
+from apps.accounts.models.signals import users_bulk_updated
 from apps.authentication.services import get_tokens_for_user
+from core.middleware.identity_map import get_identity_map
+from core.passwords import hash_passwords
 from django.contrib.sites.shortcuts import get_current_site
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
-from django.db.models import ManyToManyField
+from django.db import models
+from django.db.models import ManyToManyField, prefetch_related_objects
+from django.utils import timezone
 from rest_framework.reverse import reverse
 
 from .exceptions import UserNotCreatedAPIException, UserNotFoundAPIException
@@ -63,6 +71,74 @@ def create_user(data) -> accounts_models.User:
         raise UserNotCreatedAPIException(detail="The user could not be inserted")
 
 
+def bulk_create_users(rows: list[dict], emails_batch_size: int = 100) -> list[accounts_models.User]:
+    """
+    Create many users with their profiles in a few statements.
+
+    The passwords are hashed in a pool of processes, the users are inserted with one `bulk_create`
+    and the profiles with one `bulk_create` per user type. The welcome emails are queued by batches
+    once the transaction is committed.
+
+    Args:
+        rows (list[dict]): The validated data of the users, as given by `UserCreateSerializer(many=True)`.
+        emails_batch_size (int): The number of welcome emails sent by one task.
+
+    Returns:
+        list[accounts_models.User]: The created users, in the order of the rows.
+
+    Raises:
+        UserNotCreatedAPIException: If the users could not be inserted, none of them is created.
+
+    Example:
+        ```python
+        serializer = UserCreateSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        bulk_create_users(rows=serializer.validated_data)
+        ```
+    """
+    User = accounts_models.User
+
+    # The fields set by the `save()` of the proxy models, which `bulk_create` does not call
+    type_fields = {User.Type.ADMIN: {"is_staff": True, "is_superuser": True}}
+    profile_models = {
+        User.Type.ADMIN: (accounts_models.AdminProfile, "admin"),
+        User.Type.TEACHER: (accounts_models.TeacherProfile, "teacher"),
+        User.Type.STUDENT: (accounts_models.StudentProfile, "student"),
+    }
+
+    passwords = hash_passwords([row["password"] for row in rows])
+
+    users = []
+    for row, password in zip(rows, passwords):
+        fields = {name: value for name, value in row.items() if name not in ("password", "confirm_password")}
+        # Required by the serializer, a row without a type must not default to an admin
+        user_type = fields.pop("type").lower()
+
+        user = User(**fields, type=user_type, **type_fields.get(user_type, {}))
+        user.email = User.objects.normalize_email(user.email)
+        user.password = password
+        users.append(user)
+
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=1000)
+
+            for user_type, (profile_model, user_field) in profile_models.items():
+                profile_model.objects.bulk_create(
+                    [profile_model(**{f"{user_field}_id": user.pk}) for user in users if user.type == user_type],
+                    batch_size=1000,
+                )
+    except Exception as exc:
+        raise UserNotCreatedAPIException(detail="The users could not be inserted") from exc
+
+    recipients = [(user.email, user.email) for user in users]
+    for start in range(0, len(recipients), emails_batch_size):
+        batch = recipients[start : start + emails_batch_size]
+        transaction.on_commit(lambda batch=batch: accounts_tasks.send_accounts_created_emails.delay(recipients=batch))
+
+    return users
+
+
 def update_user(user_id: int, data: dict[str:Any]) -> accounts_models.User:
     """
     Update a user's information.
@@ -94,9 +170,38 @@ def update_user(user_id: int, data: dict[str:Any]) -> accounts_models.User:
         return user
 
 
+def bulk_update_users(queryset, changes: dict[str, Any]) -> list:
+    """
+    Apply the same changes to all the users of the queryset with a single `UPDATE ... WHERE`.
+
+    A queryset `update()` neither calls `save()` nor sends `post_save`, so the `updated_at` stamp is
+    set here and `users_bulk_updated` is sent to let the receivers drop the cached users.
+
+    Args:
+        queryset (QuerySet): The users to update.
+        changes (dict): The validated values of the fields to change.
+
+    Returns:
+        list: The ids of the updated users.
+
+    Example:
+        ```python
+        user_ids = bulk_update_users(User.objects.filter(is_verified=False), {"is_active": False})
+        ```
+    """
+    with transaction.atomic():
+        # Lock the matching users, so the ids sent to the receivers are the ones actually updated
+        user_ids = list(queryset.select_for_update().values_list("id", flat=True))
+        if user_ids:
+            queryset.update(**changes, updated_at=timezone.now())
+            users_bulk_updated.send(sender=accounts_models.User, user_ids=user_ids)
+
+    return user_ids
+
+
 def get_user_by_id(user_id: int) -> accounts_models.User:
     """
-    Retrieve a user by their ID.
+    Retrieve a user by their ID, once per request thanks to the identity map of the request.
 
     Args:
         user_id (int): The ID of the user to retrieve.
@@ -105,24 +210,32 @@ def get_user_by_id(user_id: int) -> accounts_models.User:
         accounts_models.User: The user object.
 
     Raises:
-        UserNotFoundException: If no user with the specified ID is found, a
-            `UserNotFoundException` exception is raised.
+        UserNotFoundAPIException: If no user with the specified ID is found, a
+            `UserNotFoundAPIException` exception is raised.
 
     Example:
         ```python
         user_id = 42
         get_user_by_id(user_id)
     """
+    identity_map = get_identity_map()
+    if identity_map is not None and (user := identity_map.get(accounts_models.User, "pk", user_id)) is not None:
+        return user
+
     try:
         user = accounts_models.User.objects.get(pk=user_id)
-        return user
     except accounts_models.User.DoesNotExist as exc:
-        raise accounts_models.User.DoesNotExist(detail=f"User with ID {user_id} does not exist.") from exc
+        raise UserNotFoundAPIException() from exc
+
+    if identity_map is not None:
+        identity_map.add(user, "email")
+
+    return user
 
 
 def get_user_by_email(email: str) -> accounts_models.User:
     """
-    Retrieve a user by their email.
+    Retrieve a user by their email, once per request thanks to the identity map of the request.
 
     Args:
         email (str): The email of the user to retrieve.
@@ -131,19 +244,27 @@ def get_user_by_email(email: str) -> accounts_models.User:
         accounts_models.User: The user object.
 
     Raises:
-        UserNotFoundException: If no user with the specified email is found, a
-            `UserNotFoundException` exception is raised.
+        UserNotFoundAPIException: If no user with the specified email is found, a
+            `UserNotFoundAPIException` exception is raised.
 
     Example:
         ```python
         email = "email@example.com"
         get_user_by_email(email)
     """
+    identity_map = get_identity_map()
+    if identity_map is not None and (user := identity_map.get(accounts_models.User, "email", email)) is not None:
+        return user
+
     try:
         user = accounts_models.User.objects.get(email=email)
-        return user
     except accounts_models.User.DoesNotExist as exc:
-        raise accounts_models.User.DoesNotExist(detail=f"User with email: {email} does not exist.") from exc
+        raise UserNotFoundAPIException() from exc
+
+    if identity_map is not None:
+        identity_map.add(user, "email")
+
+    return user
 
 
 def delete_user(user_id: int) -> None:
@@ -154,8 +275,7 @@ def delete_user(user_id: int) -> None:
         user_id (int): The ID of the user to delete.
 
     Raises:
-        SomeSpecificException: If there is an issue during user deletion, a specific exception
-            is raised.
+        UserNotFoundAPIException: If no user with the specified ID is found.
 
     Example:
         ```python
@@ -163,9 +283,94 @@ def delete_user(user_id: int) -> None:
         delete_user(user_id)
         ```
     """
+    soft_delete_user(get_user_by_id(user_id))
+
+
+def soft_delete_user(user: accounts_models.User) -> None:
+    """
+    Soft delete a user: the user is hidden right away, and purged later with all its data.
+
+    Deleting a user cascades into its profile, its OTP numbers, its tokens and its groups, so the cost of
+    a hard delete grows with the data the user owns. Here a single `UPDATE` hides the user from the managers
+    (so the user can neither be found nor authenticated anymore), then `purge_deleted_users` deletes it by batches.
+
+    Args:
+        user (accounts_models.User): The user to delete.
+
+    Example:
+        ```python
+        soft_delete_user(request.user)
+        ```
+    """
+    now = timezone.now()
+
     with transaction.atomic():
-        user = get_user_by_id(user_id)
-        user.delete()
+        accounts_models.User.objects.filter(pk=user.pk).update(deleted_at=now, is_active=False, updated_at=now)
+        users_bulk_updated.send(sender=accounts_models.User, user_ids=[user.pk])
+
+        transaction.on_commit(lambda: accounts_tasks.purge_deleted_users.delay())
+
+    user.deleted_at, user.is_active, user.updated_at = now, False, now
+
+    identity_map = get_identity_map()
+    if identity_map is not None:
+        identity_map.discard(user)
+
+
+def purge_deleted_users(batch_size: int = 500) -> int:
+    """
+    Delete for good a batch of the soft deleted users, with all the rows referencing them.
+
+    The rows referencing the users (e.g. the OTP numbers, the outstanding tokens) are deleted, or detached
+    when their relation is `SET_NULL`, by batches of `batch_size` rows in their own transaction, so no
+    statement locks a large number of rows. Then the users themselves are deleted.
+
+    Args:
+        batch_size (int): The number of users, and of rows referencing them, handled by one statement.
+
+    Returns:
+        int: The number of purged users, lower than `batch_size` once all the deleted users are purged.
+
+    Example:
+        ```python
+        while purge_deleted_users(batch_size=500) == 500:
+            pass
+        ```
+    """
+    User = accounts_models.User
+
+    user_ids = list(User.all_objects.filter(deleted_at__isnull=False).values_list("pk", flat=True)[:batch_size])
+    if not user_ids:
+        return 0
+
+    for relation in User._meta.related_objects:
+        if relation.many_to_many or relation.on_delete not in (models.CASCADE, models.SET_NULL):
+            continue
+
+        related_model = relation.related_model
+        # The detached rows are changed, their version must change with them (e.g. the users they managed)
+        has_updated_at = "updated_at" in {field.name for field in related_model._meta.concrete_fields}
+
+        related_queryset = related_model._base_manager.filter(**{f"{relation.field.name}__in": user_ids})
+        while related_pks := list(related_queryset.values_list("pk", flat=True)[:batch_size]):
+            with transaction.atomic():
+                batch = related_model._base_manager.filter(pk__in=related_pks)
+                if relation.on_delete is models.CASCADE:
+                    batch.delete()
+                    continue
+
+                changes = {relation.field.name: None}
+                if has_updated_at:
+                    changes["updated_at"] = timezone.now()
+                batch.update(**changes)
+
+                if issubclass(related_model, User):
+                    users_bulk_updated.send(sender=User, user_ids=related_pks)
+
+    with transaction.atomic():
+        User.all_objects.filter(pk__in=user_ids).delete()
+
+    return len(user_ids)
 
 
 def get_user_sub_model(user_type: str) -> accounts_models.User:
@@ -245,3 +450,47 @@ def get_user_details(user: accounts_models.User):
         "name": user.get_full_name(),
         "tokens": get_tokens_for_user(user=user),
     }
+
+
+def get_user_profile(user: accounts_models.User):
+    """
+    Get the profile matching the type of the user.
+
+    Only the relation of the user type is read: from the cache filled by `select_related`
+    or `prefetch_user_profiles` when it is loaded, otherwise with a single query.
+
+    Args:
+        user (accounts_models.User): The user whose profile is needed.
+
+    Returns:
+        AdminProfile | TeacherProfile | StudentProfile | None: The profile, None if the user has none.
+    """
+    related_name = accounts_models.User.PROFILE_RELATIONS.get(user.type.lower())
+    if related_name is None:
+        return None
+
+    try:
+        return getattr(user, related_name)
+    except ObjectDoesNotExist:
+        return None
+
+
+def prefetch_user_profiles(users: list[accounts_models.User]) -> None:
+    """
+    Load the profiles of many users at once, with one query per user type among them.
+
+    Example:
+        ```python
+        users = list(accounts_models.User.objects.filter(is_active=True))
+        prefetch_user_profiles(users)
+        profiles = [get_user_profile(user) for user in users]  # No more queries
+        ```
+    """
+    users_by_relation = defaultdict(list)
+    for user in users:
+        related_name = accounts_models.User.PROFILE_RELATIONS.get(user.type.lower())
+        if related_name is not None:
+            users_by_relation[related_name].append(user)
+
+    for related_name, related_users in users_by_relation.items():
+        prefetch_related_objects(related_users, related_name)
@@ -1,6 +1,8 @@
 from celery import shared_task
 from celery.exceptions import MaxRetriesExceededError
 from core.mailers import RegisterMailer, VerificationMailer
+from django.conf import settings
+from django.core.mail import get_connection
 
 
 @shared_task(bind=True, max_retries=3)
@@ -20,6 +22,27 @@ def send_account_created_email(self, full_name: str, user_email: str):
             raise MaxRetriesExceededError(f"Max retries exceeded: {exc}") from exc
 
 
+@shared_task(bind=True, max_retries=3)
+def send_accounts_created_emails(self, recipients: list[tuple[str, str]]):
+    """Send the welcome emails of a batch of new users over a single connection"""
+    try:
+        mails = [
+            RegisterMailer(full_name=full_name, to_emails=user_email).create_service()
+            for full_name, user_email in recipients
+        ]
+
+        get_connection(fail_silently=False).send_messages(mails)
+
+        return f"{len(mails)} created account emails have been sent...!"
+    except Exception as exc:
+        if self.request.retries < self.max_retries:
+            # Retry the task with exponential backoff (2^retry_number seconds)
+            self.retry(exc=exc, countdown=2**self.request.retries)
+        else:
+            # Handle the case where retries are exhausted (optional)
+            raise MaxRetriesExceededError(f"Max retries exceeded: {exc}") from exc
+
+
 @shared_task(bind=True, max_retries=3)
 def send_account_verification_email(self, request, user_email: str):
     try:
@@ -35,3 +58,25 @@ def send_account_verification_email(self, request, user_email: str):
         else:
             # Handle the case where retries are exhausted (optional)
             raise MaxRetriesExceededError(f"Max retries exceeded: {exc}") from exc
+
+
+@shared_task(bind=True, max_retries=3)
+def purge_deleted_users(self):
+    """Purge a batch of the soft deleted users, then queue the next batch until all of them are purged"""
+    # The services queue the tasks of this module, they are imported once both modules are loaded
+    from apps.accounts import services as accounts_services
+
+    try:
+        purged = accounts_services.purge_deleted_users(batch_size=settings.USERS_PURGE_BATCH_SIZE)
+
+        if purged == settings.USERS_PURGE_BATCH_SIZE:
+            purge_deleted_users.delay()
+
+        return f"{purged} deleted users have been purged...!"
+    except Exception as exc:
+        if self.request.retries < self.max_retries:
+            # Retry the task with exponential backoff (2^retry_number seconds)
+            self.retry(exc=exc, countdown=2**self.request.retries)
+        else:
+            # Handle the case where retries are exhausted (optional)
+            raise MaxRetriesExceededError(f"Max retries exceeded: {exc}") from exc
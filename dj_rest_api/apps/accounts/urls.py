@@ -1,11 +1,20 @@
 from django.urls import path
 
-from .views import ProfileDetailsUpdateView, UserDetailsUpdateDestroyView, UserListCreateView, VerifyUserAccount
+from .views import (
+    ProfileDetailsUpdateView,
+    UserBatchRetrieveView,
+    UserBulkCreateUpdateView,
+    UserDetailsUpdateDestroyView,
+    UserListCreateView,
+    VerifyUserAccount,
+)
 
 app_name = "accounts-api"
 
 urlpatterns = [
     path("", UserListCreateView.as_view(), name="list-create-users"),
+    path("batch", UserBatchRetrieveView.as_view(), name="batch-retrieve-users"),
+    path("bulk", UserBulkCreateUpdateView.as_view(), name="bulk-create-update-users"),
     path("<uuid:id>", UserDetailsUpdateDestroyView.as_view(), name="user-details-update-destroy"),
     path("<uuid:id>/profile", ProfileDetailsUpdateView.as_view(), name="profile-details-update"),
     path("verify_email", VerifyUserAccount.as_view(), name="email-verify"),
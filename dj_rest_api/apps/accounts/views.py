@@ -1,7 +1,19 @@
+import json
+from collections import defaultdict
+
 from apps.accounts import models, services
+from core.api import exceptions as core_exceptions
 from core.api.serializers import BaseModelSerializer
-from core.api.views import BaseGenericAPIView
+from core.api.views import (
+    BaseGenericAPIView,
+    CachedRetrieveMixin,
+    ConditionalRequestMixin,
+    EagerLoadingMixin,
+    NonAtomicRequestsMixin,
+    StreamingListMixin,
+)
 from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db.models.query import QuerySet
 from rest_framework.mixins import (
     CreateModelMixin,
@@ -14,10 +26,14 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
-from . import filters, permissions, responses, serializers
+from . import caches, exceptions, filters, pagination, permissions, responses, serializers
 
 
 class UserListCreateView(
+    NonAtomicRequestsMixin,
+    ConditionalRequestMixin,
+    EagerLoadingMixin,
+    StreamingListMixin,
     ListModelMixin,
     CreateModelMixin,
     BaseGenericAPIView,
@@ -27,14 +43,21 @@ class UserListCreateView(
 
     Inherits from ListModelMixin and CreateModelMixin to provide
     GET and POST methods for user listing and creation. Additionally,
+    the whole listing can be streamed with `?stream=true`, and polling
+    clients sending `If-None-Match` get a `304` while no user has changed.
+    Only the creation runs in a transaction, the listing does not pay for one.
 
     Example:
         To list users, send a GET request to the endpoint.
+        To stream all the users at once, send a GET request with `?stream=true`.
         To create a user, send a POST request with the required data.
     """
 
     permission_classes = [permissions.UserListCreatePermission]
+    atomic_methods = ("POST",)
     filterset_class = filters.UserFilter
+    pagination_class = pagination.UserCursorPagination
+    streaming_response_class = responses.UserListStreamingAPIResponse
 
     def get_queryset(self):
         if self.request.method == "GET":
@@ -61,19 +84,29 @@ class UserListCreateView(
         """
         Handles GET requests for listing users.
 
-        Retrieves the queryset, paginates it, and serializes the data.
+        Retrieves the queryset, paginates it with a keyset cursor, and serializes the data.
+        When streaming is requested, all the users are streamed without pagination.
 
         Returns:
-            Response: The paginated user data response.
+            Response: The paginated user data response, or `304` if the client copy is still fresh.
         """
         queryset = self.filter_queryset(self.get_queryset())
 
+        if self.is_streaming_requested():
+            return self.get_streaming_response(queryset)
+
         page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+
+        # The version of the listing is read from the rows of the page, before anything gets serialized
+        if (response := self.get_conditional_response(page=rows)) is not None:
+            return response
+
         if page is not None:
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(queryset, many=True)
+        serializer = self.get_serializer(rows, many=True)
 
         return responses.UserListAPIResponse(serializer.data)
 
@@ -106,6 +139,10 @@ class UserListCreateView(
 
 
 class UserDetailsUpdateDestroyView(
+    NonAtomicRequestsMixin,
+    CachedRetrieveMixin,
+    ConditionalRequestMixin,
+    EagerLoadingMixin,
     RetrieveModelMixin,
     UpdateModelMixin,
     DestroyModelMixin,
@@ -116,10 +153,14 @@ class UserDetailsUpdateDestroyView(
 
     Inherits from RetrieveModelMixin, UpdateModelMixin, and DestroyModelMixin
     to provide GET, PUT, PATCH, and DELETE methods for user details.
+    Reads honour `If-None-Match`/`If-Modified-Since` and writes honour
+    `If-Match`/`If-Unmodified-Since`, so updates are not lost between clients.
+    The serialized user details are cached until the user or its profile changes.
 
     Attributes:
         queryset (QuerySet): The queryset for retrieving users.
         lookup_field (str): The lookup field for retrieving users by ID.
+        use_identity_map (bool): The user is loaded once per request, and shared with the services.
 
     Example:
         To retrieve user details, send a GET request to the endpoint with the user's ID.
@@ -128,8 +169,18 @@ class UserDetailsUpdateDestroyView(
     """
 
     permission_classes = [permissions.UserDetailsUpdateDestroyPermission]
+    atomic_methods = ("PUT", "PATCH", "DELETE")
     queryset = get_user_model().objects.all()
     lookup_field = "id"
+    use_identity_map = True
+    response_cache = caches.user_details_cache
+    # The details render the profile of the user type, which is saved apart from the user
+    version_fields = (
+        "updated_at",
+        "admin_profile__updated_at",
+        "student_profile__updated_at",
+        "teacher_profile__updated_at",
+    )
 
     def get_serializer_class(self, *args, **kwargs) -> BaseModelSerializer:
         """
@@ -153,13 +204,14 @@ class UserDetailsUpdateDestroyView(
 
         Retrieves the user, serializes the data, and returns the response.
 
-
         Returns:
-            Response: The user details response.
+            Response: The user details response, or `304` if the client copy is still fresh.
         """
         user = self.get_object()
-        serializer = self.get_serializer(instance=user, context={"request": request})
-        return responses.UserDetailsAPIResponse(data=serializer.data)
+        if (response := self.get_conditional_response(instance=user)) is not None:
+            return response
+
+        return responses.UserDetailsAPIResponse(data=self.get_cached_data(user))
 
     def put(self, request, *args, **kwargs):
         """
@@ -172,6 +224,8 @@ class UserDetailsUpdateDestroyView(
         """
         partial = kwargs.pop("partial", False)
         instance = self.get_object()
+        self.get_conditional_response(instance=instance)
+
         serializer = self.get_serializer(
             instance=instance,
             data=request.data,
@@ -205,6 +259,8 @@ class UserDetailsUpdateDestroyView(
             Response: The user update response.
         """
         instance = self.get_object()
+        self.get_conditional_response(instance=instance)
+
         serializer = self.get_serializer(
             instance=instance,
             data=request.data,
@@ -231,9 +287,170 @@ class UserDetailsUpdateDestroyView(
             Response: The user deletion response.
         """
         user = self.get_object()
+        self.get_conditional_response(instance=user)
+
         self.perform_destroy(user)
         return responses.UserDestroyAPIResponse()
 
+    def perform_destroy(self, instance):
+        # The user is hidden right away, its data is purged in the background
+        services.soft_delete_user(instance)
+
+
+class UserBatchRetrieveView(NonAtomicRequestsMixin, EagerLoadingMixin, BaseGenericAPIView):
+    """
+    A view for retrieving many users at once, by their ids.
+
+    The users are fetched with one `id__in` query joined with their profiles, and the object permissions
+    are checked on the loaded users without any other query. The users are returned in the order of the
+    requested ids, the ids which are not found (or not permitted) get a not found marker instead.
+
+    Example:
+        To retrieve users, send a GET request with `?ids=<id>,<id>` (up to `USERS_BATCH_MAX_SIZE` ids).
+    """
+
+    permission_classes = [permissions.UserDetailsUpdateDestroyPermission]
+    queryset = get_user_model().objects.all()
+    serializer_class = serializers.UserDetailsSerializer
+
+    def get(self, request, *args, **kwargs) -> Response:
+        """
+        Handles GET requests for retrieving users by their ids.
+
+        Returns:
+            Response: The users, or a not found marker, for every requested id.
+        """
+        ids_serializer = serializers.UserBatchRetrieveSerializer(data=request.query_params)
+        ids_serializer.is_valid(raise_exception=True)
+        ids = ids_serializer.validated_data["ids"]
+
+        users = self.filter_queryset(self.get_queryset()).filter(id__in=ids)
+
+        # Check the object permissions of all the users at once, the denied users are reported as not found
+        permissions = self.get_permissions()
+        users = [
+            user for user in users if all(perm.has_object_permission(request, self, user) for perm in permissions)
+        ]
+
+        serialized_users = {user["id"]: user for user in self.get_serializer(users, many=True).data}
+
+        not_found = exceptions.UserNotFoundAPIException.detail_
+        data = [serialized_users.get(user_id) or {"id": user_id, "error": not_found} for user_id in map(str, ids)]
+
+        return responses.UserBatchAPIResponse(data=data)
+
+
+class UserBulkCreateUpdateView(BaseGenericAPIView):
+    """
+    A view for creating or updating many users at once.
+
+    The created users are validated together (one query checks that none of the emails is taken), their
+    passwords are hashed in parallel, and they are inserted with their profiles in a few bulk statements.
+    The welcome emails are sent by batches once the users are committed.
+
+    The updated users are grouped by change-set: every distinct change-set is validated once and applied
+    with a single `UPDATE ... WHERE`, whatever the number of users sharing it.
+
+    Example:
+        To create users, send a POST request with a list of users (up to `USERS_BULK_CREATE_MAX_SIZE` users).
+        To update users, send a PATCH request with `{"users": [{"id": <id>, "changes": {...}}]}`,
+        or with `{"filter": {...}, "changes": {...}}` to change all the users matching the filter.
+    """
+
+    permission_classes = [permissions.UserBulkPermission]
+    queryset = get_user_model().objects.all()
+
+    def get_serializer_class(self) -> BaseModelSerializer:
+        serializer_classes = {
+            "POST": serializers.UserCreateSerializer,
+            "PATCH": serializers.UserBulkUpdateSerializer,
+        }
+
+        return serializer_classes.get(self.request.method, None)
+
+    def post(self, request, *args, **kwargs) -> Response:
+        """
+        Handles POST requests for creating many users.
+
+        Returns:
+            Response: The ids and the emails of the created users, in the order they were sent.
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        users = services.bulk_create_users(rows=serializer.validated_data)
+
+        return responses.UserBulkCreatedAPIResponse(data=[{"id": str(user.id), "email": user.email} for user in users])
+
+    def patch(self, request, *args, **kwargs) -> Response:
+        """
+        Handles PATCH requests for updating many users.
+
+        Returns:
+            Response: The outcome of every user, `updated` or the reason it was not.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        if "filter" in serializer.validated_data:
+            data = self.update_filtered_users(**serializer.validated_data)
+        else:
+            data = self.update_listed_users(users=serializer.validated_data["users"])
+
+        return responses.UserBulkUpdateAPIResponse(data=data)
+
+    def validate_changes(self, changes: dict) -> serializers.UserBulkUpdateChangesSerializer:
+        changes_serializer = serializers.UserBulkUpdateChangesSerializer(data=changes, partial=True)
+        changes_serializer.is_valid()
+        return changes_serializer
+
+    def update_filtered_users(self, filter: dict, changes: dict) -> list[dict]:
+        """Apply the changes to all the users matching the filter, all or nothing"""
+        filterset = filters.UserFilter(data=filter, queryset=self.get_queryset(), request=self.request)
+
+        # An unknown filter would be ignored, and the changes applied to every user
+        unknown_filters = sorted(set(filter) - set(filterset.filters))
+        if unknown_filters:
+            raise core_exceptions.SerializerFieldsAPIException(
+                detail={"filter": [f"{name} is not a valid filter" for name in unknown_filters]}
+            )
+        if not filterset.is_valid():
+            raise core_exceptions.SerializerFieldsAPIException(detail={"filter": filterset.errors})
+
+        changes_serializer = self.validate_changes(changes)
+        if changes_serializer.errors:
+            raise core_exceptions.SerializerFieldsAPIException(detail={"changes": changes_serializer.errors})
+
+        user_ids = services.bulk_update_users(filterset.qs, changes_serializer.validated_data)
+
+        return [{"id": str(user_id), "status": "updated"} for user_id in user_ids]
+
+    def update_listed_users(self, users: list[dict]) -> list[dict]:
+        """Apply its own changes to every listed user, the outcomes are returned in the order of the users"""
+        # Many users usually share the same changes (e.g. `{"is_active": false}`), they are updated together
+        change_sets = defaultdict(list)
+        for user in users:
+            change_sets[json.dumps(user["changes"], sort_keys=True, cls=DjangoJSONEncoder)].append(user["id"])
+
+        outcomes = {}
+        not_found = exceptions.UserNotFoundAPIException.detail_
+        for change_set, user_ids in change_sets.items():
+            changes_serializer = self.validate_changes(json.loads(change_set))
+            if changes_serializer.errors:
+                outcomes.update({user_id: {"error": changes_serializer.errors} for user_id in user_ids})
+                continue
+
+            queryset = self.get_queryset().filter(id__in=user_ids)
+            updated_ids = set(services.bulk_update_users(queryset, changes_serializer.validated_data))
+            outcomes.update(
+                {
+                    user_id: {"status": "updated"} if user_id in updated_ids else {"error": not_found}
+                    for user_id in user_ids
+                }
+            )
+
+        return [{"id": str(user["id"]), **outcomes[user["id"]]} for user in users]
+
 
 class VerifyUserAccount(BaseGenericAPIView):
     """Verify the user by the token send it to the email"""
@@ -251,9 +468,26 @@ class VerifyUserAccount(BaseGenericAPIView):
         return responses.ActivatedAccountAPIResponse()
 
 
-class ProfileDetailsUpdateView(RetrieveModelMixin, UpdateModelMixin, BaseGenericAPIView):
+class ProfileDetailsUpdateView(
+    NonAtomicRequestsMixin,
+    CachedRetrieveMixin,
+    ConditionalRequestMixin,
+    RetrieveModelMixin,
+    UpdateModelMixin,
+    BaseGenericAPIView,
+):
+    atomic_methods = ("PUT", "PATCH")
     queryset = get_user_model().objects.all()
     lookup_field = "id"
+    use_identity_map = True
+    response_cache = caches.user_profile_cache
+    # The profile changes with the user or with whichever profile the user type has
+    version_fields = (
+        "updated_at",
+        "admin_profile__updated_at",
+        "student_profile__updated_at",
+        "teacher_profile__updated_at",
+    )
 
     def get_serializer_class(self):
         """
@@ -268,6 +502,10 @@ class ProfileDetailsUpdateView(RetrieveModelMixin, UpdateModelMixin, BaseGeneric
             serializer_class = serializers.get_profile_serializer(user_type=user.type.lower())
             return serializer_class
 
+    def get_serialized_data(self, user) -> dict:
+        """Serialize the profile of the user type, read with a single query"""
+        return self.get_serializer(instance=services.get_user_profile(user)).data
+
     def get(self, request, *args, **kwargs) -> Response:
         """
         Handles GET requests for retrieving user details.
@@ -275,8 +513,10 @@ class ProfileDetailsUpdateView(RetrieveModelMixin, UpdateModelMixin, BaseGeneric
         Retrieves the user, serializes the data, and returns the response.
 
         Returns:
-            Response: The user details response.
+            Response: The user details response, or `304` if the client copy is still fresh.
         """
         user = self.get_object()
-        serializer = self.get_serializer(instance=user, context={"request": request})
-        return responses.UserDetailsAPIResponse(user_data=serializer.data)
+        if (response := self.get_conditional_response(instance=user)) is not None:
+            return response
+
+        return responses.UserDetailsAPIResponse(data=self.get_cached_data(user))
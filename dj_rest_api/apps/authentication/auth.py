@@ -1,7 +1,14 @@
+import hashlib
+import time
+
+from apps.accounts.caches import authenticated_user_cache
+from core.api.cache import LocalLRUCache
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
 from rest_framework import HTTP_HEADER_ENCODING
 from rest_framework_simplejwt.authentication import JWTAuthentication as SimpleJWTAuthentication
-from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
 from rest_framework_simplejwt.settings import api_settings
 
 from . import exceptions
@@ -9,11 +16,20 @@ from . import exceptions
 AUTH_HEADER_TYPES = api_settings.AUTH_HEADER_TYPES
 AUTH_HEADER_TYPE_BYTES = {h.encode(HTTP_HEADER_ENCODING) for h in AUTH_HEADER_TYPES}
 
+# The tokens already validated by the process, by the hash of the raw token, until they expire
+validated_token_cache = LocalLRUCache(
+    max_size=settings.VALIDATED_TOKEN_CACHE_SIZE,
+    timeout=api_settings.ACCESS_TOKEN_LIFETIME.total_seconds(),
+)
+
 
 class CustomJWTAuthentication(SimpleJWTAuthentication):
     """
     An authentication plugin that authenticates requests through a JSON web
     token provided in a request header.
+
+    The users are read from `authenticated_user_cache` by the user id claim, and only
+    loaded from the database on a miss.
     """
 
     www_authenticate_realm = "api"
@@ -79,9 +95,76 @@ class CustomJWTAuthentication(SimpleJWTAuthentication):
         """
         Validates an encoded JSON web token and returns a validated token
         wrapper object.
+
+        The clients send the same token with all their requests, so the
+        validated tokens are cached until they expire, skipping the decoding
+        and the signature check of the next requests.
         """
+        key = hashlib.sha256(raw_token).digest()
+        validated_token = validated_token_cache.get(key)
+        if validated_token is not None:
+            return validated_token
+
         for AuthToken in api_settings.AUTH_TOKEN_CLASSES:
             try:
-                return AuthToken(raw_token)
+                validated_token = AuthToken(raw_token)
             except TokenError:
                 raise exceptions.JWTAccessTokenNotValidAPIException()
+
+            # Never served after its expiration, even within the leeway
+            expires_in = validated_token.payload.get("exp", 0) - time.time()
+            if expires_in > 0:
+                validated_token_cache.set(key, validated_token, timeout=expires_in)
+
+            return validated_token
+
+    def get_user(self, validated_token):
+        """
+        Finds the user of the given validated token, in the cache of the
+        authenticated users first.
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        entry = authenticated_user_cache.get(user_id)
+        if entry is None:
+            # Checks the user and raises for the missing and the inactive users, which are never cached
+            user = super().get_user(validated_token)
+            authenticated_user_cache.set(user)
+            return user
+
+        # The cached users are active, their changes drop them from the cache
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != entry["password_hash"]:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return authenticated_user_cache.get_user(entry)
+
+
+class CustomJWTTokenUserAuthentication(CustomJWTAuthentication):
+    """
+    An authentication plugin that authenticates requests through a JSON web
+    token, without loading the user.
+
+    The user is a `TOKEN_USER_CLASS` built from the claims of the token, for the
+    endpoints which only need the id of the user and never check its permissions.
+
+    Usage Example:
+        ```python
+        class UserNotificationsView(BaseGenericAPIView):
+            authentication_classes = [CustomJWTTokenUserAuthentication]
+            permission_classes = [IsAuthenticated]
+
+            def get(self, request, *args, **kwargs):
+                notifications = Notification.objects.filter(user_id=request.user.id)
+                ...
+        ```
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        return api_settings.TOKEN_USER_CLASS(validated_token)
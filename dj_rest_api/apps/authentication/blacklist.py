@@ -0,0 +1,203 @@
+"""
+In-process index of the blacklisted refresh tokens.
+
+Every refresh and every logout checks that the refresh token is not blacklisted, and the blacklist only grows
+with the rotation of the refresh tokens. The `jti` of the blacklisted tokens are indexed in a Bloom filter of
+the process instead, so only the tokens which are probably blacklisted are looked up in the database.
+
+The filter is rebuilt from the database every `TOKEN_BLACKLIST_INDEX_REBUILD_INTERVAL`, and updated with the
+tokens blacklisted since its last update whenever a process blacklists a token: a version shared in the cache
+is renewed after every commit of a blacklisted token, and polled by the checks at most once every
+`TOKEN_BLACKLIST_INDEX_POLL_INTERVAL`. A token blacklisted by another process may thus pass the checks of this
+process for up to that interval.
+
+A single thread refreshes the filter, out of the lock of the index: the other threads keep checking the current
+filter meanwhile, and the new filter is swapped in once built.
+"""
+
+import hashlib
+import math
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+# The tokens blacklisted this long before the last update are read again, for the transactions committed late
+UPDATE_OVERLAP = timedelta(seconds=60)
+
+# The smallest filter built, so the first blacklisted tokens do not require a rebuild right away
+MIN_CAPACITY = 10000
+
+
+class BloomFilter:
+    """
+    A set of strings which may report a string it does not contain, at a rate of `false_positive_rate`
+    while it holds at most `capacity` strings, but never misses a string it contains.
+
+    Usage Example:
+        ```python
+        bloom_filter = BloomFilter(capacity=1000, false_positive_rate=0.01)
+        bloom_filter.add(jti)
+
+        assert jti in bloom_filter
+        ```
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        self.capacity = capacity
+        self.size = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        self.hashes_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(self.size // 8 + 1)
+        self.count = 0
+
+    def get_positions(self, value: str):
+        # The positions of the hashes are derived from two hashes (Kirsch-Mitzenmacher)
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+        return ((first + i * second) % self.size for i in range(self.hashes_count))
+
+    def add(self, value: str) -> None:
+        for position in self.get_positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.get_positions(value))
+
+
+class TokenBlacklistIndex:
+    """
+    Bloom filter of the `jti` of the blacklisted refresh tokens, kept up to date with the database.
+
+    Usage Example:
+        ```python
+        if token_blacklist_index.might_contain(jti):
+            # Probably blacklisted, only the database knows for sure
+            if BlacklistedToken.objects.filter(token__jti=jti).exists():
+                raise TokenError(_("Token is blacklisted"))
+        ```
+    """
+
+    version_key = "authentication:token-blacklist-version"
+
+    def __init__(self, alias: str = "default"):
+        self.alias = alias
+        self.filter = None
+        self.built_at = self.polled_at = 0.0
+        self.updated_at = None
+        self.version = None
+        # The tokens added while a new filter is being built, added to it once built
+        self._added_while_building = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get_version(self) -> str:
+        version = self.cache.get(self.version_key)
+        if version is None:
+            # Missing (e.g. evicted), a new version makes every process update its filter once
+            self.cache.add(self.version_key, uuid.uuid4().hex, timeout=None)
+            version = self.cache.get(self.version_key)
+        return version
+
+    def build(self) -> None:
+        """Build the filter from the unexpired blacklisted tokens, the expired ones are rejected anyway"""
+        with self._lock:
+            self._added_while_building = []
+
+        version = self.get_version()
+        updated_at = timezone.now()
+
+        tokens = BlacklistedToken.objects.filter(token__expires_at__gt=updated_at)
+        # Leave room for the tokens blacklisted until the next rebuild
+        bloom_filter = BloomFilter(
+            capacity=max(MIN_CAPACITY, tokens.count() * 2),
+            false_positive_rate=settings.TOKEN_BLACKLIST_INDEX_FALSE_POSITIVE_RATE,
+        )
+        for jti in tokens.values_list("token__jti", flat=True).iterator(chunk_size=10000):
+            bloom_filter.add(jti)
+
+        with self._lock:
+            for jti in self._added_while_building:
+                bloom_filter.add(jti)
+            self._added_while_building = None
+
+            self.filter, self.version, self.updated_at = bloom_filter, version, updated_at
+            self.built_at = time.monotonic()
+
+    def update(self) -> None:
+        """Add the tokens blacklisted since the last update to the filter"""
+        version = self.get_version()
+        updated_at = timezone.now()
+
+        tokens = BlacklistedToken.objects.filter(blacklisted_at__gte=self.updated_at - UPDATE_OVERLAP)
+        jtis = list(tokens.values_list("token__jti", flat=True).iterator(chunk_size=10000))
+
+        with self._lock:
+            for jti in jtis:
+                self.filter.add(jti)
+            self.version, self.updated_at = version, updated_at
+
+    def is_refresh_due(self) -> bool:
+        return self.filter is None or time.monotonic() - self.polled_at >= settings.TOKEN_BLACKLIST_INDEX_POLL_INTERVAL
+
+    def refresh(self) -> None:
+        """Rebuild the filter when it is too old or too full, update it when a token was blacklisted"""
+        # Until the first filter is built, the checks wait for it
+        if not self._refresh_lock.acquire(blocking=self.filter is None):
+            return
+
+        try:
+            if not self.is_refresh_due():
+                # Refreshed by another thread meanwhile
+                return
+
+            self.polled_at = time.monotonic()
+            is_stale = self.polled_at - self.built_at > settings.TOKEN_BLACKLIST_INDEX_REBUILD_INTERVAL
+            if self.filter is None or is_stale or self.filter.count > self.filter.capacity:
+                self.build()
+            elif self.get_version() != self.version:
+                self.update()
+        finally:
+            self._refresh_lock.release()
+
+    def might_contain(self, jti: str) -> bool:
+        """Whether the token is probably blacklisted, False only if it is certainly not"""
+        if self.is_refresh_due():
+            self.refresh()
+
+        return jti in self.filter
+
+    def add(self, jti: str) -> None:
+        """Add a token blacklisted by the current process, and notify the other processes once committed"""
+        with self._lock:
+            if self.filter is not None:
+                self.filter.add(jti)
+            if self._added_while_building is not None:
+                self._added_while_building.append(jti)
+
+        transaction.on_commit(self.notify)
+
+    def notify(self) -> None:
+        self.cache.set(self.version_key, uuid.uuid4().hex, timeout=None)
+
+
+token_blacklist_index = TokenBlacklistIndex()
+
+
+@receiver(post_save, sender=BlacklistedToken, dispatch_uid="blacklisted_token_post_save_index")
+def index_blacklisted_token(sender, instance, created, **kwargs):
+    """Index the blacklisted token, from the logouts, the rotations of the refresh tokens and the admin"""
+    if created:
+        token_blacklist_index.add(instance.token.jti)
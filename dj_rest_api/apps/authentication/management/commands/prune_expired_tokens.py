@@ -0,0 +1,45 @@
+from apps.authentication import services as auth_services
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+
+class Command(BaseCommand):
+    """
+    Management command to delete the expired outstanding and blacklisted tokens by batches.
+
+    The same pruning runs every night through the `prune-expired-tokens` periodic task, this command
+    runs it on demand, e.g. to catch up on a large backlog with bigger batches.
+
+    Usage Example:
+        ```bash
+        python manage.py prune_expired_tokens --batch-size 5000 --sleep 0.05
+        ```
+    """
+
+    help = "Delete the expired outstanding and blacklisted tokens by batches"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.TOKENS_PRUNE_BATCH_SIZE,
+            help="The number of expired tokens deleted by one statement",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=settings.TOKENS_PRUNE_SLEEP,
+            help="The number of seconds to wait between two batches",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE("Pruning the expired tokens..."))
+
+        report = auth_services.prune_expired_tokens(batch_size=options["batch_size"], sleep=options["sleep"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {report['outstanding_tokens']} outstanding and {report['blacklisted_tokens']} blacklisted "
+                f"tokens in {report['seconds']:.2f}s ({report['rows_per_second']:.0f} rows/sec)"
+            )
+        )
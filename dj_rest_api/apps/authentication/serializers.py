@@ -1,37 +1,30 @@
-from apps.accounts.models import User
 from apps.authentication import models as auth_models
+from core import passwords
 from core.api.serializers import BaseSerializer
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 
 from ..accounts.exceptions import UserNotFoundAPIException
-from . import exceptions
+from ..accounts.services import get_user_by_email
+from . import exceptions, tokens
 
 
 class LoginSerializer(BaseSerializer):
+    """The credentials of the user, checked by `services.login()` with a single query"""
+
     email = serializers.CharField(required=True)
     password = serializers.CharField(required=True)
 
-    def validate_email(self, value):
-        if value:
-            # Check if the email exists in the user mode
-            user = User.objects.filter(email=value)
-            if not user.exists():
-                raise UserNotFoundAPIException()
-
-            user = user.first()
-            # Check if the user is inactive
-            if not user.is_active:
-                raise exceptions.UserNotActiveAPIException()
 
-            # if not user.is_password_changed:
-            #     raise FirstTimePasswordAPIException(user=user.)
+class LogoutSerializer(BaseSerializer):
+    refresh = serializers.CharField()
 
-        return value
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """Rotates the refresh tokens, checking them against the blacklist index"""
 
-class LogoutSerializer(BaseSerializer):
-    refresh = serializers.CharField()
+    token_class = tokens.CustomRefreshToken
 
 
 class ForgetPasswordRequestSerializer(BaseSerializer):
@@ -55,11 +48,10 @@ class VerifyOTPNumberSerializer(BaseSerializer):
     otp = serializers.CharField(min_length=1, write_only=True)
 
     def validate(self, attrs):
-        user = get_user_model().objects.filter(email=attrs["email"])
-        if not user.exists():
-            raise UserNotFoundAPIException()
+        # Loaded once for the request, the view gets the same instance
+        user = get_user_by_email(email=attrs["email"])
 
-        otp_instance = auth_models.OTPNumber.objects.filter(user=user.first(), number=attrs["otp"])
+        otp_instance = auth_models.OTPNumber.objects.filter(user=user, number=attrs["otp"])
 
         # Check if the OTP number does not exists
         if not otp_instance.exists():
@@ -86,7 +78,7 @@ class ChangePasswordSerializer(BaseSerializer):
 
         # Validate the if the old password is correct for the request user
         user = self.context["request"].user
-        if not user.check_password(attrs["old_password"]):
+        if not passwords.check_password(attrs["old_password"], user.password):
             raise exceptions.WrongPasswordAPIException()
 
         # Check if the two inserted password are similar
@@ -1,8 +1,13 @@
+import time
+
 from apps.accounts import models as accounts_models
+from apps.accounts.exceptions import UserNotFoundAPIException
 from apps.authentication import exceptions
 from apps.authentication import models as auth_models
 from apps.authentication import tokens
-from django.contrib.auth import authenticate
+from core import passwords
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
 from rest_framework_simplejwt.tokens import RefreshToken
 
 # def get_user_from_access_token(token: str):
@@ -16,6 +21,9 @@ def login(request, email: str, password: str) -> accounts_models.User:
     """
     Logs in a user using their email and password.
 
+    The user is read with a single query, then checked on that instance:
+    it must be active, and the password is checked in the pool of processes.
+
     Args:
         request: HTTP request object.
         email: User's email address.
@@ -25,20 +33,57 @@ def login(request, email: str, password: str) -> accounts_models.User:
         User: Authenticated user.
 
     Raises:
-        CredentialsNotValidAPIException: If the provided credentials are not valid.
+        UserNotFoundAPIException: If no user has the email.
+        UserNotActiveAPIException: If the user is inactive.
+        CredentialsNotValidAPIException: If the password is not valid.
+        TooBusyAPIException: If the pool checking the passwords is full.
     """
-    user = authenticate(
-        request=request,
-        username=email,
-        password=password,
-    )
+    try:
+        user = accounts_models.User._default_manager.get_by_natural_key(email)
+    except accounts_models.User.DoesNotExist:
+        raise UserNotFoundAPIException()
+
+    if not user.is_active:
+        raise exceptions.UserNotActiveAPIException()
+
+    def upgrade_password(raw_password: str) -> None:
+        passwords.set_password(user, raw_password)
+        user.save(update_fields=["password"])
 
-    if not user:
+    if not passwords.check_password(password, user.password, setter=upgrade_password):
         raise exceptions.CredentialsNotValidAPIException()
 
     return user
 
 
+def login_user(request, email: str, password: str) -> dict:
+    """
+    Logs in a user and issues their tokens.
+
+    Costs one query to read the user and one to record the refresh token.
+
+    Args:
+        request: HTTP request object.
+        email: User's email address.
+        password: User's password.
+
+    Returns:
+        dict: The name of the user and their tokens, as `get_user_details()` returns them.
+
+    Example:
+        ```python
+        details = login_user(request=request, email=email, password=password)
+        return LoginAPIResponse(data=details)
+        ```
+    """
+    user = login(request=request, email=email, password=password)
+
+    return {
+        "name": user.get_full_name(),
+        "tokens": get_tokens_for_user(user=user),
+    }
+
+
 def logout(refresh_token: str) -> bool:
     """
     Logs out a user by blacklisting their refresh token.
@@ -121,8 +166,8 @@ def set_new_password_for_user(user: accounts_models.User, password: str) -> bool
     Returns:
         bool: True if the password is successfully updated.
     """
-    # Set the new password for the user
-    user.set_password(password)
+    # Set the new password for the user, hashed in the pool of processes
+    passwords.set_password(user, password)
     user.save()
 
     delete_otp_number_for_user(user=user)
@@ -141,7 +186,7 @@ def set_first_time_password_for_user(user: accounts_models.User, password: str)
     Returns:
         bool: True if the password is successfully set.
     """
-    user.set_password(password)
+    passwords.set_password(user, password)
 
     # Set password changed to true
     if not user.is_password_changed:
@@ -167,3 +212,50 @@ def get_tokens_for_user(user: accounts_models.User) -> dict:
         "refresh_token": str(token),
         "access_token": str(token.access_token),
     }
+
+
+def prune_expired_tokens(batch_size: int = 1000, sleep: float = 0.0) -> dict:
+    """
+    Delete the expired outstanding tokens and their blacklisted tokens, by batches.
+
+    The expired tokens are read in the order of their primary key, from the last one deleted, so every batch
+    walks the primary key index instead of scanning the table again. Each batch is deleted in its own short
+    transaction, and the pruning sleeps between the batches, so the logins and the refreshes writing the
+    same tables are never blocked for long.
+
+    Args:
+        batch_size (int): The number of outstanding tokens deleted by one batch.
+        sleep (float): The number of seconds to wait between two batches.
+
+    Returns:
+        dict: The number of deleted outstanding and blacklisted tokens, and the deleted rows per second.
+
+    Example:
+        ```python
+        report = prune_expired_tokens(batch_size=1000, sleep=0.1)
+        logger.info("%(rows_per_second).0f rows/sec", report)
+        ```
+    """
+    now = timezone.now()
+    deleted = {"outstanding_tokens": 0, "blacklisted_tokens": 0}
+    start = time.perf_counter()
+
+    expired_tokens = OutstandingToken.objects.filter(expires_at__lte=now).order_by("pk")
+    last_pk = 0
+    while token_pks := list(expired_tokens.filter(pk__gt=last_pk).values_list("pk", flat=True)[:batch_size]):
+        last_pk = token_pks[-1]
+
+        # The blacklisted tokens are deleted with their outstanding tokens (CASCADE)
+        _, deleted_rows = OutstandingToken.objects.filter(pk__in=token_pks).delete()
+        deleted["outstanding_tokens"] += deleted_rows.get(OutstandingToken._meta.label, 0)
+        deleted["blacklisted_tokens"] += deleted_rows.get(BlacklistedToken._meta.label, 0)
+
+        if sleep and len(token_pks) == batch_size:
+            time.sleep(sleep)
+
+    seconds = time.perf_counter() - start
+    return {
+        **deleted,
+        "seconds": seconds,
+        "rows_per_second": sum(deleted.values()) / seconds if seconds else 0.0,
+    }
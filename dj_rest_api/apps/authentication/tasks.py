@@ -1,6 +1,12 @@
+import logging
+
+from apps.authentication import services as auth_services
 from celery import shared_task
 from celery.exceptions import MaxRetriesExceededError
 from core.mailers import OTPMailer
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task(bind=True, max_retries=3)
@@ -38,3 +44,32 @@ def send_otp_number_email(self, otp_number: str, user_email: str) -> None:
         else:
             # Handle the case where retries are exhausted
             raise MaxRetriesExceededError(f"Max retries exceeded: {exc}") from exc
+
+
+@shared_task(bind=True, max_retries=3)
+def prune_expired_tokens(self) -> str:
+    """
+    Deletes the expired outstanding and blacklisted tokens, scheduled by `CELERY_BEAT_SCHEDULE`.
+
+    Usage Example:
+        prune_expired_tokens.delay()
+    """
+    try:
+        report = auth_services.prune_expired_tokens(
+            batch_size=settings.TOKENS_PRUNE_BATCH_SIZE,
+            sleep=settings.TOKENS_PRUNE_SLEEP,
+        )
+        logger.info(
+            "Pruned %(outstanding_tokens)s outstanding and %(blacklisted_tokens)s blacklisted tokens "
+            "in %(seconds).2fs (%(rows_per_second).0f rows/sec)",
+            report,
+        )
+
+        return f"{report['outstanding_tokens']} expired tokens have been pruned...!"
+    except Exception as exc:
+        if self.request.retries < self.max_retries:
+            # Retry the task with exponential backoff (2^retry_number seconds)
+            self.retry(exc=exc, countdown=2**self.request.retries)
+        else:
+            # Handle the case where retries are exhausted (optional)
+            raise MaxRetriesExceededError(f"Max retries exceeded: {exc}") from exc
@@ -2,6 +2,8 @@ from core.api import exceptions
 from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import AccessToken, BlacklistMixin, RefreshToken
 
+from .blacklist import token_blacklist_index
+
 
 class JWTAccessToken(AccessToken):
     """Extended AccessToken class for overriding token validation errors"""
@@ -59,6 +61,14 @@ class CustomRefreshToken(RefreshToken):
         if api_settings.TOKEN_TYPE_CLAIM is not None:
             self.verify_token_type()
 
+    def check_blacklist(self):
+        """
+        Checks if this token is present in the token blacklist, only querying
+        the database when the blacklist index reports it as probably present.
+        """
+        if token_blacklist_index.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
     def verify_token_type(self):
         """
         Ensures that the token type claim is present and has the correct value.
@@ -1,7 +1,8 @@
 from apps.accounts.exceptions import UserNotFoundAPIException
-from apps.accounts.services import get_user_by_email, get_user_details
+from apps.accounts.services import get_user_by_email
 from apps.authentication import services
 from core.api.permissions import BasePermission
+from core.api.throttling import TokenBucketThrottle
 from core.api.views import BaseGenericAPIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 
@@ -24,6 +25,8 @@ class LoginView(BaseGenericAPIView):
     """
 
     serializer_class = serializers.LoginSerializer
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "login"
 
     def post(self, request, *args, **kwargs):
         """
@@ -45,9 +48,9 @@ class LoginView(BaseGenericAPIView):
         # Login with the passed credentials
         email, password = serializer.data.get("email"), serializer.data.get("password")
 
-        user = services.login(request=request, email=email, password=password)
+        user_details = services.login_user(request=request, email=email, password=password)
 
-        return responses.LoginAPIResponse(data=get_user_details(user=user))
+        return responses.LoginAPIResponse(data=user_details)
 
 
 class LogoutView(BaseGenericAPIView):
@@ -102,6 +105,8 @@ class ForgetPasswordRequestView(BaseGenericAPIView):
 
     permission_classes = [AllowAny]
     serializer_class = serializers.ForgetPasswordRequestSerializer
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "otp_request"
 
     def post(self, request):
         """
@@ -146,6 +151,8 @@ class VerifyOTPNumberView(BaseGenericAPIView):
 
     permission_classes = [AllowAny]
     serializer_class = serializers.VerifyOTPNumberSerializer
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "otp_verify"
 
     def post(self, request, *args, **kwargs):
         """
@@ -161,15 +168,13 @@ class VerifyOTPNumberView(BaseGenericAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # Get the user
-        user = get_user_by_email(email)
+        # Get the user, already loaded by the serializer
+        user = get_user_by_email(email=serializer.validated_data["email"])
 
-        # Add access token to the response
-        verified, user = services.verify_otp_number_for_user(
-            email=serializer.data.get("email"), number=serializer.data.get("opt_number")
-        )
+        services.verify_otp_number_for_user(user=user, number=serializer.validated_data["otp"])
 
-        return responses.VerifyOTPAPIResponse(data=user.get_tokens()["access"])
+        # Add access token to the response
+        return responses.VerifyOTPAPIResponse(data=services.get_tokens_for_user(user)["access_token"])
 
 
 class ForgetPasswordView(BaseGenericAPIView):
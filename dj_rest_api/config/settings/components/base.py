@@ -24,6 +24,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.identity_map.IdentityMapMiddleware",
+    "core.middleware.replica_routing.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
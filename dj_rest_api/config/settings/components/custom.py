@@ -1,6 +1,45 @@
 # OTP number's expiratoin time configuration (in seconds)
 OTP_EXPIRATION = 300  # seconds
 
+# Time to live of the cached user details and profiles (in seconds)
+RESPONSE_CACHE_TIMEOUT = 300  # seconds
+
+# Time to live of the users cached by the JWT authentication (in seconds). The copies kept in the memory of
+# every process are not dropped when a user changes in another process, so they live shorter.
+AUTH_USER_CACHE_TIMEOUT = 60  # seconds
+AUTH_USER_LOCAL_CACHE_TIMEOUT = 5  # seconds
+AUTH_USER_LOCAL_CACHE_SIZE = 1024
+
+# The number of access tokens kept validated in the memory of every process (0 to validate every request)
+VALIDATED_TOKEN_CACHE_SIZE = 4096
+
+# The in-process index of the blacklisted refresh tokens, rebuilt from the database every interval (in seconds)
+TOKEN_BLACKLIST_INDEX_REBUILD_INTERVAL = 3600  # seconds
+TOKEN_BLACKLIST_INDEX_FALSE_POSITIVE_RATE = 0.01
+# The version of the index shared by the processes is polled at most once per interval (in seconds)
+TOKEN_BLACKLIST_INDEX_POLL_INTERVAL = 1  # seconds
+
+# The number of expired tokens deleted by one statement, and the pause between two statements (in seconds)
+TOKENS_PRUNE_BATCH_SIZE = 1000
+TOKENS_PRUNE_SLEEP = 0.1  # seconds
+
+# The maximum number of users handled by one batch request
+USERS_BATCH_MAX_SIZE = 100
+USERS_BULK_CREATE_MAX_SIZE = 10000
+USERS_BULK_UPDATE_MAX_SIZE = 10000
+
+# The number of soft deleted users (and of rows referencing them) purged by one statement
+USERS_PURGE_BATCH_SIZE = 500
+
+# The number of worker processes of the server on one host (e.g. `gunicorn --workers`)
+SERVER_WORKERS = 1
+# The number of processes hashing the passwords in parallel, per server worker process
+# (None for the CPUs of the host divided by `SERVER_WORKERS`)
+PASSWORD_HASHING_WORKERS = None
+# The hashes waiting for the pool (None for 4 per process), and how long a new one waits for a slot (in seconds)
+PASSWORD_HASHING_MAX_PENDING = None
+PASSWORD_HASHING_ADMISSION_TIMEOUT = 1  # seconds
+
 # Django Superuser configuration
 ROOT_USER_EMAIL = "admin@gmail.com"
 ROOT_USER_FIRSTNAME = "admin"
@@ -11,7 +11,31 @@ DATABASES = {
         "HOST": "localhost",
         "PORT": "5432",
         "ATOMIC_REQUESTS": True,
-        "CONN_MAX_AGE": 0,
+        # Keep the connections open between the requests, and check them before reusing them
+        "CONN_MAX_AGE": 60,
+        "CONN_HEALTH_CHECKS": True,
+        # The threaded and ASGI workers can share a pool of connections instead, with `CONN_MAX_AGE: 0`:
+        # "ENGINE": "core.db.backends.postgresql_pool",
+        # "OPTIONS": {"pool": {"min_size": 4, "max_size": 16, "timeout": 5, "check_idle_after": 30}},
+    }
+}
+
+
+# Read replicas: the alias of every replica in `DATABASES`, with its share of the reads (e.g. {"replica": 1})
+# The safe requests read from a replica, unless their client has written in the last `REPLICA_PIN_SECONDS`
+DATABASE_REPLICAS = {}
+DATABASE_ROUTERS = ["core.db.routers.ReplicaRouter"]
+REPLICA_PIN_SECONDS = 5
+
+
+# Cache configurations
+# The per-process memory cache should be overridden by a shared cache (e.g. Redis) in production
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "drest",
     }
 }
 
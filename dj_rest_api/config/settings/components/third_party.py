@@ -1,8 +1,11 @@
 from datetime import timedelta
 
+from celery.schedules import crontab
+
 INSTALLED_APPS += (  # type: ignore # noqa: F821
     "rest_framework",
     "rest_framework_simplejwt",
+    "rest_framework_simplejwt.token_blacklist",
     "corsheaders",
 )
 
@@ -27,6 +30,7 @@ SIMPLE_JWT = {
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
     "TOKEN_TYPE_CLAIM": "token_type",
     "TOKEN_USER_CLASS": "rest_framework_simplejwt.models.TokenUser",
+    "TOKEN_REFRESH_SERIALIZER": "apps.authentication.serializers.CustomTokenRefreshSerializer",
     "JTI_CLAIM": "jti",
     "SLIDING_TOKEN_REFRESH_EXP_CLAIM": "refresh_exp",
     "SLIDING_TOKEN_LIFETIME": timedelta(minutes=5),
@@ -46,9 +50,24 @@ REST_FRAMEWORK = {
         "rest_framework.parsers.MultiPartParser",
         "core.api.parsers.PlainTextParser",
     ],
-    "DEFAULT_VERSIONING_CLASS": "rest_framework.versioning.NamespaceVersioning",
+    "DEFAULT_PAGINATION_CLASS": "core.api.pagination.KeysetCursorPagination",
+    "PAGE_SIZE": 50,
+    "DEFAULT_VERSIONING_CLASS": "core.api.versioning.NamespaceVersioning",
     "DEFAULT_VERSION": "1.0",
     "ALLOWED_VERSIONS": ["1.0", "2.0"],
+    # The proxies in front of the application (nginx), the address of the client is the one they append to
+    # `X-Forwarded-For`: the addresses sent by the client itself can not reset its throttling buckets
+    "NUM_PROXIES": 1,
+    # The rates of `core.api.throttling.TokenBucketThrottle` by `throttle_scope`: "<scope>" per client IP,
+    # "<scope>:email" per posted email and "<scope>:user" per authenticated user
+    "DEFAULT_THROTTLE_RATES": {
+        "login": "30/min",
+        "login:email": "5/min",
+        "otp_request": "10/hour",
+        "otp_request:email": "3/hour",
+        "otp_verify": "30/hour",
+        "otp_verify:email": "5/15min",
+    },
 }
 
 API_VERSION = "1.0"
@@ -65,3 +84,11 @@ CELERY_RESULT_BACKEND = "django-db"
 CELERY_CACHE_BACKEND = "django-cache"
 
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+
+# Periodic tasks, run by `celery beat`
+CELERY_BEAT_SCHEDULE = {
+    "prune-expired-tokens": {
+        "task": "apps.authentication.tasks.prune_expired_tokens",
+        "schedule": crontab(hour=3, minute=0),
+    },
+}
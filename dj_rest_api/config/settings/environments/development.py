@@ -17,9 +17,16 @@ DATABASES = {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": "dev-db.sqlite3",
         "ATOMIC_REQUESTS": True,
-    }
+    },
+    # The same database seen as a replica, to try the routing of the reads locally
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": "dev-db.sqlite3",
+    },
 }
 
+DATABASE_REPLICAS = {"replica": 1}
+
 
 # Use a dummy email backend during tests (optional)
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
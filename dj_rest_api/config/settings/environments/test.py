@@ -11,7 +11,13 @@ DATABASES = {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": "test-db.sqlite3",
         "ATOMIC_REQUESTS": True,
-    }
+    },
+    # The primary seen as a replica, the tests enable it with `DATABASE_REPLICAS = {"replica": 1}`
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": "test-db.sqlite3",
+        "TEST": {"MIRROR": "default"},
+    },
 }
 
 
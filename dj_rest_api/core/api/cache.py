@@ -0,0 +1,185 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import translation
+
+from ..db.routers import is_reading_from_replica
+
+# Left in place of the invalidated entries while the replicas may still serve the previous state
+INVALIDATED = "invalidated"
+
+
+def invalidate_entries(cache, keys: list[str]) -> None:
+    """
+    Drop the cached entries of changed rows.
+
+    With read replicas, the entries are replaced by `INVALIDATED` for `REPLICA_PIN_SECONDS` instead, so a request
+    reading the previous state from a lagging replica can not cache it again (see `fill_entry`).
+    """
+    if settings.DATABASE_REPLICAS:
+        cache.set_many(dict.fromkeys(keys, INVALIDATED), settings.REPLICA_PIN_SECONDS)
+    else:
+        cache.delete_many(keys)
+
+
+def fill_entry(cache, key: str, value, timeout: int | None) -> bool:
+    """
+    Cache the value read from the database on a miss, return whether it was cached.
+
+    A value read from a replica does not replace an entry, in particular the `INVALIDATED` ones.
+    """
+    if is_reading_from_replica():
+        return cache.add(key, value, timeout)
+
+    cache.set(key, value, timeout)
+    return True
+
+
+class ResponseDataCache:
+    """
+    Cache of the serialized data of one kind of resource, on top of Django's cache framework.
+
+    Every entry is keyed by the resource id, the API version and the language of the request.
+    The versions and the languages are bounded by `REST_FRAMEWORK["ALLOWED_VERSIONS"]` and
+    `LANGUAGES`, so all the entries of a resource are invalidated with a single `delete_many`.
+    The hits and misses of the process are counted to monitor the efficiency of the cache.
+
+    Usage Example:
+        ```python
+        user_details_cache = ResponseDataCache(namespace="accounts:user-details")
+
+        data = user_details_cache.get(user.pk, version=request.version)
+        if data is None:
+            data = UserDetailsSerializer(user).data
+            user_details_cache.set(user.pk, data, version=request.version)
+
+        # From the receivers of the model signals
+        user_details_cache.invalidate(user.pk)
+        ```
+    """
+
+    def __init__(self, namespace: str, timeout: int | None = None, alias: str = "default"):
+        self.namespace = namespace
+        self.timeout = timeout if timeout is not None else settings.RESPONSE_CACHE_TIMEOUT
+        self.alias = alias
+        self.hits = self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get_language(self) -> str | None:
+        """Get the active language among `LANGUAGES`, None if the language is not supported"""
+        try:
+            return translation.get_supported_language_variant(translation.get_language())
+        except LookupError:
+            return None
+
+    def get_key(self, pk, version: str | None, language: str) -> str:
+        return f"{self.namespace}:{pk}:{version}:{language}"
+
+    def get_keys(self, pk) -> list[str]:
+        """Get the keys of all the entries that may be cached for the resource"""
+        versions = settings.REST_FRAMEWORK.get("ALLOWED_VERSIONS") or [None]
+        languages = [code for code, _ in settings.LANGUAGES]
+        return [self.get_key(pk, version, language) for version in versions for language in languages]
+
+    def get(self, pk, version: str | None = None):
+        """Get the cached data of the resource, None on a miss"""
+        language = self.get_language()
+        data = self.cache.get(self.get_key(pk, version, language)) if language else None
+        if data == INVALIDATED:
+            data = None
+
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return data
+
+    def set(self, pk, data, version: str | None = None) -> None:
+        language = self.get_language()
+        if language:
+            fill_entry(self.cache, self.get_key(pk, version, language), data, self.timeout)
+
+    def invalidate(self, *pks) -> None:
+        """Drop the entries of the resources for all the versions and the languages"""
+        invalidate_entries(self.cache, [key for pk in pks for key in self.get_keys(pk)])
+
+    def stats(self) -> dict:
+        """Get the hits and misses of the current process"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class LocalLRUCache:
+    """
+    In-process cache of the most recently used entries, each one expiring after its own timeout.
+
+    It is read without any network round trip, in front of a shared cache or instead of it. Its entries can
+    not be invalidated from the other processes, so they must live shorter than the staleness the caller
+    accepts. The entries are shared by the threads of the process, the callers must not mutate them.
+
+    Usage Example:
+        ```python
+        local_cache = LocalLRUCache(max_size=1024, timeout=5)
+
+        value = local_cache.get(key)
+        if value is None:
+            value = compute(key)
+            local_cache.set(key, value)
+        ```
+    """
+
+    def __init__(self, max_size: int, timeout: float):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Get the value of the key, `default` if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout: float | None = None) -> None:
+        """Store the value for `timeout` seconds (the default timeout if None), evicting the least recently used"""
+        if self.max_size <= 0:
+            return
+
+        expires_at = time.monotonic() + (timeout if timeout is not None else self.timeout)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,117 @@
+from typing import NamedTuple
+
+from django.db import connections
+
+
+class CountResult(NamedTuple):
+    """The total of a listing, `is_exact` is False when the value is a lower bound or an estimate"""
+
+    value: int
+    is_exact: bool = True
+    is_capped: bool = False
+
+    def __str__(self) -> str:
+        if self.is_capped:
+            return f"{self.value}+"
+
+        return str(self.value) if self.is_exact else f"~{self.value}"
+
+
+class BaseCountStrategy:
+    """
+    Base class of the strategies counting the total items of a listing.
+
+    Usage Example:
+        ```python
+        class UserCursorPagination(KeysetCursorPagination):
+            count_strategy = CappedCount(cap=1000)
+        ```
+    """
+
+    def count(self, queryset) -> CountResult:
+        raise NotImplementedError(f"{self.__class__.__name__}.count() must be implemented.")
+
+
+class ExactCount(BaseCountStrategy):
+    """Run a `COUNT(*)` over the whole filtered queryset"""
+
+    def count(self, queryset) -> CountResult:
+        return CountResult(queryset.order_by().count())
+
+
+class CappedCount(BaseCountStrategy):
+    """
+    Count up to `cap` items and report `cap+` beyond, the database stops scanning
+    after `cap + 1` rows whatever the size of the table.
+    """
+
+    def __init__(self, cap: int = 1000):
+        self.cap = cap
+
+    def count(self, queryset) -> CountResult:
+        value = queryset.order_by()[: self.cap + 1].count()
+
+        if value > self.cap:
+            return CountResult(self.cap, is_exact=False, is_capped=True)
+
+        return CountResult(value)
+
+
+class EstimatedCount(BaseCountStrategy):
+    """
+    Read the estimate of the PostgreSQL planner instead of counting.
+
+    Unfiltered querysets read `pg_class.reltuples` of the table, filtered ones read the rows estimated
+    by `EXPLAIN`. The filters of the default manager (e.g. the soft-deleted rows) do not count as filters:
+    they hide a small part of the table, the estimate of the table is used for them. Estimates under
+    `threshold` are cheap to count so they are counted exactly.
+    On the other databases, or when the table has never been analyzed, the `fallback` strategy is used.
+    """
+
+    def __init__(self, threshold: int = 1000, fallback: BaseCountStrategy | None = None):
+        self.threshold = threshold
+        self.fallback = fallback or CappedCount(cap=threshold)
+
+    def count(self, queryset) -> CountResult:
+        queryset = queryset.order_by()
+        connection = connections[queryset.db]
+
+        if connection.vendor != "postgresql":
+            return self.fallback.count(queryset)
+
+        if self.is_filtered(queryset):
+            estimate = self.get_planner_estimate(queryset, connection)
+        else:
+            estimate = self.get_table_estimate(queryset, connection)
+
+        if estimate is None or estimate < 0:
+            return self.fallback.count(queryset)
+
+        if estimate < self.threshold:
+            return CountResult(queryset.count())
+
+        return CountResult(int(estimate), is_exact=False)
+
+    def is_filtered(self, queryset) -> bool:
+        """Whether the queryset is filtered beyond the default manager of its table (the proxy models filter it)"""
+        return queryset.query.where != queryset.model._meta.concrete_model._default_manager.all().query.where
+
+    def get_table_estimate(self, queryset, connection) -> int | None:
+        """Get the rows of the table estimated by the last `ANALYZE` (-1 if never analyzed)"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+
+        return row[0] if row else None
+
+    def get_planner_estimate(self, queryset, connection) -> int | None:
+        """Get the rows of the query estimated by the planner"""
+        sql, params = queryset.query.sql_with_params()
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+
+        return plan[0]["Plan"]["Plan Rows"] if plan else None
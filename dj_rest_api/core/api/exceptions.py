@@ -1,4 +1,5 @@
 import enum
+import math
 from typing import T
 
 from django.utils.translation import gettext_lazy as _
@@ -10,6 +11,10 @@ class ErrorCode(enum.Enum):
     Field_Error = _("field_error")
     Permission_Denied = _("permission_denied")
     Not_Authenticated = _("not_authenticated")
+    Invalid_Cursor = _("invalid_cursor")
+    Precondition_Failed = _("precondition_failed")
+    Too_Busy = _("too_busy")
+    Throttled = _("throttled")
 
 
 class BaseAPIException(APIException):
@@ -109,3 +114,42 @@ class NotAuthenticatedAPIException(BaseAPIException):
         "detail": "Authentication credentials were not provided.",
     }
     status_code = status.HTTP_401_UNAUTHORIZED
+
+
+class InvalidCursorAPIException(BaseAPIException):
+    default_detail = {
+        "code": ErrorCode.Invalid_Cursor.value,
+        "detail": _("The pagination cursor is not valid."),
+    }
+    status_code = status.HTTP_400_BAD_REQUEST
+
+
+class PreconditionFailedAPIException(BaseAPIException):
+    default_detail = {
+        "code": ErrorCode.Precondition_Failed.value,
+        "detail": _("The resource has been modified since it was fetched."),
+    }
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+
+
+class TooBusyAPIException(BaseAPIException):
+    default_detail = {
+        "code": ErrorCode.Too_Busy.value,
+        "detail": _("The server is too busy to handle the request, please retry later."),
+    }
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    # Sent as the `Retry-After` header (in seconds)
+    wait = 1
+
+
+class ThrottledAPIException(BaseAPIException):
+    default_detail = {
+        "code": ErrorCode.Throttled.value,
+        "detail": _("Too many requests, please retry later."),
+    }
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+
+    def __init__(self, wait: float | None = None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        # Sent as the `Retry-After` header (in seconds)
+        self.wait = math.ceil(wait) if wait is not None else None
@@ -0,0 +1,37 @@
+from django.db.models import Q
+from django_filters import CharFilter
+from django_filters.constants import EMPTY_VALUES
+
+
+class SearchFilter(CharFilter):
+    """
+    Case-insensitive substring search over several fields.
+
+    Every whitespace separated term of the value must be found in at least one of the fields.
+    The lookups compile to `UPPER(field::text) LIKE UPPER('%term%')`, on PostgreSQL they are served by
+    trigram GIN indexes over `UPPER(field::text)` (see the `pg_trgm` migrations), on the other
+    databases they are plain `LIKE` lookups.
+
+    Usage Example:
+        ```python
+        class UserFilter(filters.FilterSet):
+            search = SearchFilter(search_fields=["email", "first_name", "last_name"])
+        ```
+    """
+
+    def __init__(self, search_fields: list[str], **kwargs):
+        self.search_fields = search_fields
+        super().__init__(**kwargs)
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+
+        for term in value.split():
+            term_filter = Q()
+            for field in self.search_fields:
+                term_filter |= Q(**{f"{field}__icontains": term})
+
+            qs = qs.filter(term_filter)
+
+        return qs.distinct() if self.distinct else qs
@@ -0,0 +1,226 @@
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import counts, exceptions, responses
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a stable, indexed ordering.
+
+    Instead of `OFFSET`, every page is fetched with a `WHERE (a, b) > (x, y)` condition built from
+    the last row of the previous page, so the cost of a page does not depend on how deep the client
+    has scrolled. The position is handed to the client as an opaque base64 cursor.
+
+    Attributes:
+        ordering (tuple[str]): The fields to order by, the last one must be unique (e.g. the primary key).
+        page_size (int): The default number of items per page, `REST_FRAMEWORK["PAGE_SIZE"]` by default.
+        page_size_query_param (str): The query parameter that lets the client choose the page size.
+        max_page_size (int): The upper bound of the page size requested by the client.
+        count_strategy (BaseCountStrategy): Counts the total of the listing, `None` to not count it.
+        response_class (BaseAPIResponse): The response used to render a page.
+
+    Usage Example:
+        ```python
+        class UserCursorPagination(KeysetCursorPagination):
+            ordering = ("date_joined", "id")
+        ```
+    """
+
+    cursor_query_param = "cursor"
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = ("pk",)
+    count_strategy = counts.CappedCount(cap=1000)
+    response_class = responses.PaginatedAPIResponse
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        position, reverse = self.decode_cursor(request, model=queryset.model)
+        ordering = self.get_ordering(reverse=reverse)
+
+        self.count = self.count_strategy.count(queryset) if self.count_strategy else None
+
+        queryset = queryset.order_by(*ordering)
+        if queryset._fields:
+            # The rows of a `.values()` queryset must carry the ordering fields to build the cursors
+            missing_fields = [
+                field.lstrip("-") for field in self.ordering if field.lstrip("-") not in queryset._fields
+            ]
+            if missing_fields:
+                queryset = queryset.values(*queryset._fields, *missing_fields)
+        else:
+            # Neither may the ordering fields be deferred by `.only()`, or every cursor costs a query
+            loaded_fields, is_deferred = queryset.query.deferred_loading
+            missing_fields = [field.lstrip("-") for field in self.ordering if field.lstrip("-") not in loaded_fields]
+            if loaded_fields and not is_deferred and missing_fields:
+                queryset = queryset.only(*loaded_fields, *missing_fields)
+
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(ordering, position))
+
+        # Fetch one extra row to know whether there is another page after this one
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if reverse:
+            # Walking backwards: restore the natural ordering of the page
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        return self.response_class(data, links=self.get_links(), count=self.count)
+
+    def get_page_size(self, request) -> int | None:
+        """Get the page size requested by the client, falling back to the default page size."""
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size,
+                )
+            except (KeyError, ValueError):
+                pass
+
+        return self.page_size
+
+    def get_ordering(self, reverse: bool = False) -> tuple[str]:
+        """Get the ordering of the queryset, flipped when walking backwards."""
+        if not reverse:
+            return tuple(self.ordering)
+
+        return tuple(field[1:] if field.startswith("-") else f"-{field}" for field in self.ordering)
+
+    def get_keyset_filter(self, ordering: tuple[str], position: list) -> Q:
+        """
+        Build the condition selecting the rows after the given position.
+
+        For an ordering `(a, b)` and a position `(x, y)` this builds `a > x OR (a = x AND b > y)`,
+        which the database can resolve with a single range scan on an index over `(a, b)`.
+        """
+        keyset_filter = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+
+            condition = Q(**{f"{name}__{lookup}": position[index]})
+            for previous_field, previous_value in zip(ordering[:index], position[:index]):
+                condition &= Q(**{previous_field.lstrip("-"): previous_value})
+
+            keyset_filter |= condition
+
+        return keyset_filter
+
+    def get_position(self, item) -> list[str]:
+        """Get the values of the ordering fields for the given item (a model instance or a `.values()` row)."""
+        position = []
+        for field in self.ordering:
+            name = field.lstrip("-")
+            value = item[name] if isinstance(item, dict) else getattr(item, name)
+            position.append(value.isoformat() if hasattr(value, "isoformat") else str(value))
+
+        return position
+
+    def decode_cursor(self, request, model=None) -> tuple[list | None, bool]:
+        """
+        Decode the cursor sent by the client into a position and a direction.
+
+        The values of the position are converted by the ordering fields of the `model`, so a tampered
+        value is rejected here instead of failing in the query.
+
+        Raises:
+            InvalidCursorAPIException: If the cursor has been tampered with.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            cursor = json.loads(b64decode(encoded.encode("ascii"), validate=False, altchars=b"-_"))
+            position, reverse = cursor["p"], bool(cursor["r"])
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, BinasciiError) as exc:
+            raise exceptions.InvalidCursorAPIException() from exc
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise exceptions.InvalidCursorAPIException()
+
+        if model is not None:
+            try:
+                position = [
+                    self.get_ordering_field(model, field).to_python(value)
+                    for field, value in zip(self.ordering, position)
+                ]
+            except (ValidationError, TypeError, ValueError) as exc:
+                raise exceptions.InvalidCursorAPIException() from exc
+
+        if None in position:
+            raise exceptions.InvalidCursorAPIException()
+
+        return position, reverse
+
+    def get_ordering_field(self, model, field: str):
+        """Get the model field of an ordering field (e.g. `"-date_joined"`)"""
+        name = field.lstrip("-")
+        return model._meta.pk if name == "pk" else model._meta.get_field(name)
+
+    def encode_cursor(self, position: list[str], reverse: bool = False) -> str:
+        """Encode a position and a direction into an opaque cursor."""
+        cursor = json.dumps({"p": position, "r": int(reverse)}, separators=(",", ":"))
+        return b64encode(cursor.encode("utf-8"), altchars=b"-_").decode("ascii")
+
+    def get_cursor_link(self, position: list[str], reverse: bool = False) -> str:
+        """Build the url of the page starting after the given position."""
+        encoded = self.encode_cursor(position, reverse=reverse)
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next or not self.page:
+            return None
+
+        return self.get_cursor_link(self.get_position(self.page[-1]))
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous:
+            return None
+
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+        return self.get_cursor_link(self.get_position(self.page[0]), reverse=True)
+
+    def get_links(self) -> dict[str, str | None]:
+        return {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+        }
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "code": {"type": "string"},
+                "detail": {"type": "string"},
+                "count": {"type": "string", "nullable": True, "example": "1000+"},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "data": schema,
+            },
+        }
@@ -1,9 +1,12 @@
 import enum
-from typing import Any, Optional, T
+import json
+from typing import Any, Iterable, Iterator, Optional, T
 
+from django.http import StreamingHttpResponse
 from django.utils.translation import gettext_lazy as _
 from rest_framework import status as rest_status
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
 
 class OperationCode(enum.Enum):
@@ -36,3 +39,80 @@ class BaseAPIResponse(Response):
     def format_data(self, data: dict | None = None) -> T:
         """Update the data in The Response"""
         return data
+
+
+class PaginatedAPIResponse(BaseAPIResponse):
+    """Listing response of one page, carrying the links of the neighbouring pages"""
+
+    default_status = rest_status.HTTP_200_OK
+
+    def __init__(self, data: Any = None, links: dict | None = None, count: Any = None, **kwargs):
+        self.links = links or {}
+        self.count = count
+        super().__init__(data, **kwargs)
+
+    def get_count(self, data: list) -> str:
+        """The total of the listing given by the count strategy of the paginator, or the page length"""
+        return str(self.count) if self.count is not None else str(len(data))
+
+    def format_data(self, data: list | None = None) -> T:
+        return {
+            "code": OperationCode.Listing.value,
+            "detail": _(f"{self.get_count(data)} items have been found"),
+            "count": self.get_count(data),
+            "next": self.links.get("next"),
+            "previous": self.links.get("previous"),
+            "data": data,
+        }
+
+
+class StreamingAPIResponse(StreamingHttpResponse):
+    """
+    Listing response which streams its rows instead of building the whole list in memory.
+
+    The rows are written inside the usual `{"code": ..., "detail": ..., "data": [...]}` envelope,
+    the head of the envelope is sent right away and the rows are flushed in batches of `flush_size`.
+
+    Usage Example:
+        ```python
+        rows = (serializer.to_representation(user) for user in queryset.iterator(chunk_size=2000))
+        return StreamingAPIResponse(rows)
+        ```
+    """
+
+    default_status = rest_status.HTTP_200_OK
+    encoder_class = JSONEncoder
+    flush_size = 500
+
+    def __init__(self, rows: Iterable[dict], status: int = None, headers: dict = None):
+        super().__init__(
+            self.stream(rows),
+            status=status or self.default_status,
+            content_type="application/json",
+            headers=headers,
+        )
+
+    def format_data(self) -> dict:
+        """The envelope fields written before the streamed rows"""
+        return {
+            "code": OperationCode.Listing.value,
+            "detail": _("The items are being streamed"),
+        }
+
+    def encode(self, data: Any) -> str:
+        return json.dumps(data, cls=self.encoder_class, ensure_ascii=False, separators=(",", ":"))
+
+    def stream(self, rows: Iterable[dict]) -> Iterator[str]:
+        # Open the envelope: '{"code":...,"detail":...' + ',"data":['
+        yield self.encode(self.format_data())[:-1] + ',"data":['
+
+        batch = []
+        for index, row in enumerate(rows):
+            batch.append(("," if index else "") + self.encode(row))
+
+            if len(batch) >= self.flush_size:
+                yield "".join(batch)
+                batch = []
+
+        batch.append("]}")
+        yield "".join(batch)
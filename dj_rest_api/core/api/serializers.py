@@ -1,13 +1,303 @@
 import datetime
+import re
+from collections import defaultdict
+from types import SimpleNamespace
 
-from rest_framework import serializers
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import models
+from rest_framework import relations, serializers
 from rest_framework.validators import ValidationError
 
 from . import exceptions
 
 
+class ProjectionListSerializer(serializers.ListSerializer):
+    """
+    List serializer of the projection mode, it renders the rows of a `.values()` queryset in batch.
+
+    The many-to-many relations of all the rows are fetched with one query per relation, then every
+    row is turned into a dict by the row function compiled by the child serializer.
+    """
+
+    def to_representation(self, data):
+        rows = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        if not rows or not isinstance(rows[0], dict):
+            # Model instances are rendered through the regular fields
+            return super().to_representation(rows)
+
+        self.child.load_many_related(rows)
+
+        row_to_representation = self.child.get_row_to_representation()
+        return [row_to_representation(row) for row in rows]
+
+
 class BaseModelSerializer(serializers.ModelSerializer):
-    """Inherited class from the Model Serializer class"""
+    """
+    Inherited class from the Model Serializer class
+
+    The relations rendered by the serializer can be declared in `Meta.select_related` and
+    `Meta.prefetch_related`, the views apply them on their queryset with `setup_eager_loading`.
+
+    Read-only listings can opt in the projection mode with `Meta.projection = True`: the declared fields
+    are compiled into a `.values()` query and a row function, so no model instance is built per row.
+
+    Clients reading the data can ask for a sparse fieldset with `?fields=id,email` or `?exclude=profile`:
+    the other fields are dropped from the serializer, and `setup_eager_loading` neither selects their
+    columns nor loads their relations.
+
+    Usage Example:
+        ```python
+        class UserListSerializer(BaseModelSerializer):
+            class Meta:
+                model = User
+                fields = ["id", "manager", "groups"]
+                select_related = ["manager"]
+                prefetch_related = ["groups"]
+        ```
+    """
+
+    fields_query_param = "fields"
+    exclude_query_param = "exclude"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        field_names = self.get_requested_field_names(self.context.get("request"), self.fields)
+        if field_names is not None:
+            for field_name in set(self.fields) - field_names:
+                self.fields.pop(field_name)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # The projection mode renders its listings through the projection list serializer
+        meta = getattr(cls, "Meta", None)
+        if getattr(meta, "projection", False) and not hasattr(meta, "list_serializer_class"):
+            meta.list_serializer_class = ProjectionListSerializer
+
+    @classmethod
+    def get_projection(cls) -> dict:
+        """
+        Compile the declared fields into the plan of the projection.
+
+        Returns:
+            dict: The `columns` to select with `.values()`, the column read by each field
+                and the `many_related` fields to fetch in batch.
+
+        Raises:
+            ImproperlyConfigured: If one of the fields can not be read from a `.values()` row.
+        """
+        if "_projection" in cls.__dict__:
+            return cls._projection
+
+        model = cls.Meta.model
+        columns, fields, many_related = [model._meta.pk.name], {}, {}
+
+        for field in cls.get_readable_fields().values():
+            if isinstance(field, relations.HyperlinkedIdentityField):
+                column = field.lookup_field
+
+            elif isinstance(field, relations.ManyRelatedField):
+                child = field.child_relation
+                if not isinstance(child, (relations.SlugRelatedField, relations.PrimaryKeyRelatedField)):
+                    raise ImproperlyConfigured(
+                        f"The field `{field.field_name}` of {cls.__name__} can not be projected."
+                    )
+
+                slug_field = child.slug_field if isinstance(child, relations.SlugRelatedField) else "pk"
+                related_query_name = model._meta.get_field(field.source).related_query_name()
+                many_related[field.field_name] = (field.source, related_query_name, slug_field)
+                continue
+
+            elif isinstance(field, relations.SlugRelatedField):
+                column = f"{field.source.replace('.', '__')}__{field.slug_field}"
+
+            elif isinstance(field, relations.PrimaryKeyRelatedField):
+                column = field.source.replace(".", "__")
+
+            elif field.source == "*" or isinstance(
+                field, (relations.RelatedField, serializers.BaseSerializer, serializers.SerializerMethodField)
+            ):
+                raise ImproperlyConfigured(f"The field `{field.field_name}` of {cls.__name__} can not be projected.")
+
+            else:
+                column = field.source.replace(".", "__")
+
+            fields[field.field_name] = column
+            if column not in columns:
+                columns.append(column)
+
+        cls._projection = {"columns": columns, "fields": fields, "many_related": many_related}
+        return cls._projection
+
+    @classmethod
+    def get_readable_fields(cls) -> dict:
+        """Get the readable fields declared by the serializer, built once per serializer class"""
+        if "_readable_fields_map" not in cls.__dict__:
+            cls._readable_fields_map = {field.field_name: field for field in cls()._readable_fields}
+
+        return cls._readable_fields_map
+
+    @classmethod
+    def get_requested_field_names(cls, request, field_names) -> set[str] | None:
+        """
+        Get the names of the fields requested with `?fields=` and `?exclude=`.
+
+        Only the reads can be narrowed, the fields of the writes are always validated.
+
+        Args:
+            request: The request of the serializer context, if any.
+            field_names: The names of all the fields of the serializer.
+
+        Returns:
+            set[str] | None: The requested names, or None when the whole representation is requested.
+        """
+        if request is None or request.method not in ("GET", "HEAD"):
+            return None
+
+        query_params = getattr(request, "query_params", request.GET)
+        only, exclude = (
+            {name.strip() for name in query_params.get(param, "").split(",") if name.strip()}
+            for param in (cls.fields_query_param, cls.exclude_query_param)
+        )
+        if not only and not exclude:
+            return None
+
+        return ((only or set(field_names)) & set(field_names)) - exclude
+
+    @classmethod
+    def get_model_columns(cls, fields) -> set[str] | None:
+        """
+        Get the concrete model fields read by the given serializer fields.
+
+        Returns:
+            set[str] | None: The names of the columns, or None if one of the fields may read any attribute
+                of the instance (e.g. a `SerializerMethodField` or a property).
+        """
+        opts = cls.Meta.model._meta
+        columns = set()
+
+        for field in fields.values():
+            if isinstance(field, relations.HyperlinkedIdentityField):
+                columns.add(field.lookup_field)
+                continue
+
+            try:
+                model_field = opts.get_field(field.source.split(".")[0])
+            except FieldDoesNotExist:
+                return None
+
+            if model_field.concrete and not model_field.many_to_many:
+                columns.add(model_field.name)
+
+        return columns
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, request=None):
+        """
+        Apply the eager loading plan declared in `Meta` on the queryset.
+
+        When a sparse fieldset is requested, only the columns and the relations of the requested fields are loaded.
+        """
+        meta = getattr(cls, "Meta", None)
+        fields = cls.get_readable_fields()
+
+        field_names = cls.get_requested_field_names(request, fields)
+        if field_names is not None:
+            fields = {field_name: field for field_name, field in fields.items() if field_name in field_names}
+
+        if getattr(meta, "projection", False):
+            # The relations are joined by the `.values()` columns and the many relations are fetched in batch
+            projection = cls.get_projection()
+            columns = [projection["fields"][field_name] for field_name in fields if field_name in projection["fields"]]
+            return queryset.values(*dict.fromkeys([queryset.model._meta.pk.name, *columns]))
+
+        # Without a sparse fieldset, or when a kept field may read the whole instance, everything is loaded
+        columns = cls.get_model_columns(fields) if field_names is not None else None
+        sources = {field.source.split(".")[0] for field in fields.values()}
+
+        select_related = getattr(meta, "select_related", None) or []
+        prefetch_related = getattr(meta, "prefetch_related", None) or []
+        if columns is not None:
+            # The relations of the dropped fields are not loaded at all
+            select_related = [lookup for lookup in select_related if lookup.split("__")[0] in sources]
+            prefetch_related = [lookup for lookup in prefetch_related if lookup.split("__")[0] in sources]
+
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+
+        if columns is not None:
+            queryset = queryset.only(queryset.model._meta.pk.name, *columns, *select_related)
+
+        return queryset
+
+    def load_many_related(self, rows: list[dict]) -> None:
+        """Fetch the many-to-many relations of all the rows, one query per relation"""
+        pk_name = self.Meta.model._meta.pk.name
+        rows_pks = [row[pk_name] for row in rows]
+
+        for field_name, (source, related_query_name, slug_field) in self.get_projection()["many_related"].items():
+            if field_name not in self.fields:
+                # Dropped by a sparse fieldset
+                continue
+
+            related_model = self.Meta.model._meta.get_field(source).related_model
+
+            values = defaultdict(list)
+            related_rows = related_model._default_manager.filter(
+                **{f"{related_query_name}__in": rows_pks}
+            ).values_list(related_query_name, slug_field)
+            for row_pk, value in related_rows:
+                values[row_pk].append(value)
+
+            for row in rows:
+                row[field_name] = values[row[pk_name]]
+
+    def get_row_to_representation(self):
+        """
+        Build the function that turns a `.values()` row into the same dict as `to_representation`.
+
+        The work depending on the fields (columns, relations kind) is done once, the returned
+        function only reads the row and calls the `to_representation` of the simple fields.
+        """
+        readers = []
+        for field in self._readable_fields:
+            readers.append((field.field_name, self._get_row_reader(field)))
+
+        def row_to_representation(row: dict) -> dict:
+            return {field_name: reader(row) for field_name, reader in readers}
+
+        return row_to_representation
+
+    def _get_row_reader(self, field):
+        """Get the function reading the representation of the field from a `.values()` row"""
+        if isinstance(field, relations.ManyRelatedField):
+            child = field.child_relation
+            if isinstance(child, relations.SlugRelatedField):
+                return lambda row: row[field.field_name]
+
+            return lambda row: [child.to_representation(relations.PKOnlyObject(pk)) for pk in row[field.field_name]]
+
+        column = self.get_projection()["fields"][field.field_name]
+
+        if isinstance(field, relations.HyperlinkedIdentityField):
+            lookup_field = field.lookup_field
+            return lambda row: field.to_representation(
+                SimpleNamespace(**{"pk": row[column], lookup_field: row[column]})
+            )
+
+        if isinstance(field, relations.SlugRelatedField):
+            return lambda row: row[column]
+
+        if isinstance(field, relations.PrimaryKeyRelatedField):
+            return lambda row: (
+                None if row[column] is None else field.to_representation(relations.PKOnlyObject(row[column]))
+            )
+
+        return lambda row: None if row[column] is None else field.to_representation(row[column])
 
     def is_valid(self, *, raise_exception=False):
         """Override is_valid method to raise custom exceptions"""
@@ -55,7 +345,7 @@ class BaseSerializer(serializers.Serializer):
 
         # Raise Field Error exception
         if self._errors and raise_exception:
-            raise exceptions.SerializerFieldsAPIException(errors=self.errors)
+            raise exceptions.SerializerFieldsAPIException(detail=self._errors)
 
         return not bool(self._errors)
 
@@ -77,3 +367,54 @@ class HourTimeField(serializers.TimeField):
 
         # Convert the hour to a datetime.time object
         return datetime.time(hour=hour)
+
+
+class TemplatedHyperlinkedIdentityField(serializers.HyperlinkedIdentityField):
+    """
+    HyperlinkedIdentityField which walks the url resolver only once per serializer.
+
+    The url of the first object is split around its lookup value into a template, the urls of the
+    next objects are formatted from that template instead of calling `reverse()` and
+    `request.build_absolute_uri()` again. The fields are copied for every serializer, so the
+    template never outlives the request.
+    """
+
+    # Lookup values which are kept as they are in the url path (uuid, integer, slug)
+    template_safe_value = re.compile(r"^[\w\-.~]+$")
+
+    def __init__(self, view_name=None, **kwargs):
+        super().__init__(view_name, **kwargs)
+        self.url_templates = {}
+
+    def get_url(self, obj, view_name, request, format):
+        # Unsaved objects will not yet have a valid URL.
+        if hasattr(obj, "pk") and obj.pk in (None, ""):
+            return None
+
+        lookup_value = str(getattr(obj, self.lookup_field))
+        if not self.template_safe_value.match(lookup_value):
+            return super().get_url(obj, view_name, request, format)
+
+        template = self.url_templates.get((view_name, format))
+        if template is None:
+            url = super().get_url(obj, view_name, request, format)
+
+            template = self.build_url_template(url, lookup_value)
+            if template is None:
+                return url
+
+            self.url_templates[(view_name, format)] = template
+
+        prefix, suffix = template
+        return f"{prefix}{lookup_value}{suffix}"
+
+    def build_url_template(self, url: str, lookup_value: str) -> tuple[str, str] | None:
+        """Split the url around the lookup value, when the value appears only once in the url path"""
+        host_end = url.find("/", url.find("//") + 2) if "//" in url else 0
+        path = url[host_end:]
+
+        if path.count(lookup_value) != 1:
+            return None
+
+        path_prefix, suffix = path.split(lookup_value)
+        return url[:host_end] + path_prefix, suffix
@@ -0,0 +1,132 @@
+import hashlib
+import re
+import time
+
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .cache import LocalLRUCache
+
+# e.g. "5/min", "3/hour", "5/15min"
+RATE_PATTERN = re.compile(r"^(?P<count>\d+)/(?P<multiplier>\d*)(?P<unit>[smhd])")
+UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """Parse a rate such as `"5/15min"` into the number of requests and the duration of the window (in seconds)"""
+    match = RATE_PATTERN.match(rate)
+    if match is None:
+        raise ValueError(f"Invalid throttle rate: {rate!r}")
+
+    return int(match["count"]), int(match["multiplier"] or 1) * UNIT_SECONDS[match["unit"]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle the requests of a view with token buckets, one per client IP, email and user.
+
+    Every bucket holds at most `count` tokens, refilled continuously at `count` per window, and a request
+    takes one token from each of its buckets. The tokens are not reset at the start of fixed windows, so
+    a client can not send twice the rate around the end of a window: the limit applies over a sliding window,
+    with a burst of at most `count` requests.
+
+    The rates are read from `REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]` by the `throttle_scope` of the view:
+    `"<scope>"` for the IP of the client, `"<scope>:email"` for the email posted in the request and
+    `"<scope>:user"` for the authenticated user. An identity without a rate is not throttled.
+
+    The buckets are stored in the shared cache (as the time they will be full again), so the limits hold
+    across the processes, approximately under concurrent requests like the throttles of DRF. The clients
+    rejected by the current process are also remembered in memory until they can retry, so a flood of
+    requests is rejected without reaching the shared cache.
+
+    The throttles run before the handler of the view, so the rejected requests never reach the database
+    nor the password hashing.
+
+    Usage Example:
+        ```python
+        REST_FRAMEWORK = {
+            "DEFAULT_THROTTLE_RATES": {"login": "30/min", "login:email": "5/15min"},
+        }
+
+        class LoginView(BaseGenericAPIView):
+            throttle_classes = [TokenBucketThrottle]
+            throttle_scope = "login"
+        ```
+    """
+
+    cache_alias = "default"
+    email_field = "email"
+
+    # The clients rejected by the process, by bucket key, until they can retry
+    rejected_clients = LocalLRUCache(max_size=10000, timeout=60)
+
+    def __init__(self):
+        self.waits = []
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def get_rate(self, scope: str, ident_kind: str) -> str | None:
+        rates = api_settings.DEFAULT_THROTTLE_RATES or {}
+        return rates.get(scope) if ident_kind == "ip" else rates.get(f"{scope}:{ident_kind}")
+
+    def get_idents(self, request) -> dict[str, str]:
+        """Get the identities of the client to throttle, by kind"""
+        idents = {"ip": self.get_ident(request)}
+
+        email = request.data.get(self.email_field) if hasattr(request.data, "get") else None
+        if isinstance(email, str) and email.strip():
+            idents["email"] = email.strip().lower()
+
+        if request.user and request.user.is_authenticated:
+            idents["user"] = str(request.user.pk)
+
+        return idents
+
+    def get_cache_key(self, scope: str, ident_kind: str, rate: str, ident: str) -> str:
+        # The idents are hashed, the emails must not be readable from the cache. A new rate starts new buckets.
+        digest = hashlib.sha256(ident.encode()).hexdigest()
+        return f"throttle:{scope}:{ident_kind}:{rate}:{digest}"
+
+    def take_token(self, key: str, count: int, duration: int) -> float:
+        """Take a token from the bucket, return the seconds to wait for the next token (0 if one was taken)"""
+        now = time.time()
+
+        # The bucket is full at `full_at`, every token taken postpones it by the interval of one token
+        interval = duration / count
+        full_at = max(self.cache.get(key, now), now)
+        wait = full_at + interval - now - duration
+        if wait > 0:
+            return wait
+
+        self.cache.set(key, full_at + interval, timeout=duration)
+        return 0.0
+
+    def allow_request(self, request, view) -> bool:
+        scope = getattr(view, "throttle_scope", None)
+        if not scope:
+            return True
+
+        self.waits = []
+        for ident_kind, ident in self.get_idents(request).items():
+            rate = self.get_rate(scope, ident_kind)
+            if rate is None:
+                continue
+
+            key = self.get_cache_key(scope, ident_kind, rate, ident)
+            if (retry_at := self.rejected_clients.get(key)) is not None:
+                self.waits.append(retry_at - time.monotonic())
+                continue
+
+            count, duration = parse_rate(rate)
+            wait = self.take_token(key, count, duration)
+            if wait > 0:
+                self.rejected_clients.set(key, time.monotonic() + wait, timeout=wait)
+                self.waits.append(wait)
+
+        return not self.waits
+
+    def wait(self) -> float | None:
+        return max(self.waits) if self.waits else None
@@ -0,0 +1,31 @@
+from rest_framework import versioning
+
+
+class NamespaceVersioning(versioning.NamespaceVersioning):
+    """
+    Extended NamespaceVersioning class for urls which are not split into version namespaces yet.
+
+    The api urls are mounted under the `api` namespace (`api:accounts-api:...`), so when none of the
+    resolved namespaces is an allowed version the default version is used instead of raising `NotFound`,
+    and the urls are reversed without a version prefix.
+    """
+
+    def determine_version(self, request, *args, **kwargs):
+        resolver_match = getattr(request, "resolver_match", None)
+        if resolver_match is None or not resolver_match.namespace:
+            return self.default_version
+
+        # Allow for possibly nested namespaces.
+        for version in resolver_match.namespace.split(":"):
+            if version in (self.allowed_versions or ()):
+                return version
+
+        return self.default_version
+
+    def get_versioned_viewname(self, viewname, request):
+        resolver_match = getattr(request, "resolver_match", None)
+        if resolver_match is None or request.version not in resolver_match.namespaces:
+            # The request has not been routed through a version namespace
+            return viewname
+
+        return super().get_versioned_viewname(viewname, request)
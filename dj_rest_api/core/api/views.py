@@ -1,12 +1,55 @@
+import hashlib
+from contextlib import ExitStack
+
+from django.db import connections, transaction
+from django.db.models.constants import LOOKUP_SEP
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.translation import get_language
 from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.views import APIView
 
-from . import exceptions
+from ..middleware.identity_map import get_identity_map
+from ..middleware.replica_routing import route_authenticated_client
+from . import exceptions, responses
 
 
 class BaseGenericAPIView(GenericAPIView):
     """Base extended class for GenericAPIView, implement custom behaviors"""
 
+    # Serve `get_object()` from the identity map of the request, the views opt in (see `get_object()`)
+    use_identity_map = False
+
+    def get_object(self):
+        """
+        Returns the object the view is displaying.
+
+        With `use_identity_map`, the object is loaded once per request and kept in the identity map of the
+        request, so the next calls (and the services looking it up by its primary key) get the same instance.
+        An instance found in the map does not go through the queryset again, only the object permissions are
+        checked every time: it is only served when the filtered queryset of the view is the one of the default
+        manager of its model. The views narrowing their queryset (e.g. to the rows of the user) query the object.
+        """
+        identity_map = get_identity_map() if self.use_identity_map else None
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if identity_map is None or lookup_url_kwarg not in self.kwargs:
+            return super().get_object()
+
+        queryset = self.filter_queryset(self.get_queryset())
+        model = queryset.model
+        if queryset.query.where != model._default_manager.all().query.where:
+            return super().get_object()
+
+        obj = identity_map.get(model, self.lookup_field, self.kwargs[lookup_url_kwarg])
+        if obj is None or not isinstance(obj, model):
+            obj = super().get_object()
+            identity_map.add(obj, self.lookup_field)
+        else:
+            self.check_object_permissions(self.request, obj)
+
+        return obj
+
     def permission_denied(self, request, message=None, code=None):
         """
         If request is not permitted, determine what kind of exception to raise.
@@ -15,6 +58,19 @@ class BaseGenericAPIView(GenericAPIView):
             raise exceptions.NotAuthenticatedAPIException()
         raise exceptions.PermissionDeniedAPIException(detail=message, code=code)
 
+    def perform_authentication(self, request):
+        """
+        Authenticate the request, then read from the primary when the authenticated client has written lately.
+        """
+        super().perform_authentication(request)
+        route_authenticated_client(request)
+
+    def throttled(self, request, wait):
+        """
+        If request is throttled, raise the exception telling the client when to retry.
+        """
+        raise exceptions.ThrottledAPIException(wait=wait)
+
 
 class BaseAPIView(APIView):
     """Base extended class for BaseAPIView, implement custom behaviors"""
@@ -26,3 +82,305 @@ class BaseAPIView(APIView):
         if request.authenticators and not request.successful_authenticator:
             raise exceptions.NotAuthenticatedAPIException()
         raise exceptions.PermissionDeniedAPIException(detail=message, code=code)
+
+    def perform_authentication(self, request):
+        """
+        Authenticate the request, then read from the primary when the authenticated client has written lately.
+        """
+        super().perform_authentication(request)
+        route_authenticated_client(request)
+
+    def throttled(self, request, wait):
+        """
+        If request is throttled, raise the exception telling the client when to retry.
+        """
+        raise exceptions.ThrottledAPIException(wait=wait)
+
+
+class NonAtomicRequestsMixin:
+    """
+    Opt the view out of `ATOMIC_REQUESTS`, so its reads are not wrapped in a transaction.
+
+    With `ATOMIC_REQUESTS`, every request pays a `BEGIN`/`COMMIT` (or a savepoint) round trip, even the
+    reads which do not need a transaction. The methods which write without their own `transaction.atomic()`
+    are listed in `atomic_methods` and keep running in a transaction.
+
+    Attributes:
+        atomic_methods (tuple[str]): The methods still run in a transaction on the `ATOMIC_REQUESTS` databases.
+
+    Usage Example:
+        ```python
+        class UserListCreateView(NonAtomicRequestsMixin, ListModelMixin, CreateModelMixin, BaseGenericAPIView):
+            atomic_methods = ("POST",)
+        ```
+    """
+
+    atomic_methods = ()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        for alias in connections:
+            view = transaction.non_atomic_requests(using=alias)(view)
+
+        return view
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in self.atomic_methods:
+            return super().dispatch(request, *args, **kwargs)
+
+        with ExitStack() as stack:
+            for alias, settings_dict in connections.settings.items():
+                if settings_dict["ATOMIC_REQUESTS"]:
+                    stack.enter_context(transaction.atomic(using=alias))
+
+            return super().dispatch(request, *args, **kwargs)
+
+
+class EagerLoadingMixin:
+    """
+    Apply the eager loading plan declared by the serializer of the request on the queryset,
+    so the relations rendered by the serializer do not cost one query per row, and the
+    columns and relations left out by a sparse fieldset (`?fields=`) are not loaded.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, "setup_eager_loading"):
+            queryset = serializer_class.setup_eager_loading(queryset, request=self.request)
+
+        return queryset
+
+
+class StreamingListMixin:
+    """
+    Stream a listing row by row when the client asks for it with `?stream=true`.
+
+    The queryset is walked with a chunked `.iterator()` and serialized one chunk at a time,
+    so the memory of the worker stays flat whatever the size of the result.
+    """
+
+    stream_query_param = "stream"
+    stream_chunk_size = 2000
+    streaming_response_class = responses.StreamingAPIResponse
+
+    def is_streaming_requested(self) -> bool:
+        value = self.request.query_params.get(self.stream_query_param, "")
+        return value.lower() in ("1", "true", "yes")
+
+    def get_streaming_response(self, queryset):
+        return self.streaming_response_class(self.stream_rows(queryset))
+
+    def stream_rows(self, queryset):
+        # The list serializer is bound once and renders the rows chunk by chunk
+        serializer = self.get_serializer(many=True)
+
+        chunk = []
+        for instance in queryset.iterator(self.stream_chunk_size):
+            chunk.append(instance)
+
+            if len(chunk) >= self.stream_chunk_size:
+                yield from serializer.to_representation(chunk)
+                chunk = []
+
+        if chunk:
+            yield from serializer.to_representation(chunk)
+
+
+class ConditionalRequestMixin:
+    """
+    Answer conditional requests from the version of the resource instead of its representation.
+
+    The version is read from the `version_fields` (e.g. `updated_at`, or `profile__updated_at` across a relation):
+    off the instance already loaded for the detail views (with a single narrow query of its row when reading them
+    would query anyway, and for the preconditions of the writes), and from the rows of the page already fetched
+    for the list views (with the query string, which holds the cursor and the filters), so the listings never
+    aggregate the table.
+    A `GET` matching `If-None-Match` or `If-Modified-Since` is answered with
+    `304 Not Modified` before anything gets serialized, and a `PUT`/`PATCH`/`DELETE` failing
+    `If-Match` or `If-Unmodified-Since` is rejected so concurrent clients do not overwrite each other.
+
+    Usage Example:
+        ```python
+        class UserDetailsView(ConditionalRequestMixin, BaseGenericAPIView):
+            version_fields = ("updated_at",)
+
+            def get(self, request, *args, **kwargs):
+                user = self.get_object()
+                if (response := self.get_conditional_response(instance=user)) is not None:
+                    return response
+                ...
+
+        class UserListView(ConditionalRequestMixin, BaseGenericAPIView):
+            def get(self, request, *args, **kwargs):
+                page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+                if (response := self.get_conditional_response(page=page)) is not None:
+                    return response
+                ...
+        ```
+    """
+
+    version_fields = ("updated_at",)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        # The version of a page is read from its rows, the version fields must not be left out of them
+        if queryset._fields:
+            missing_fields = [field for field in self.version_fields if field not in queryset._fields]
+            if missing_fields:
+                queryset = queryset.values(*queryset._fields, *missing_fields)
+        else:
+            # The fields across a relation can not be loaded by `.only()` without joining the whole relation
+            loaded_fields, is_deferred = queryset.query.deferred_loading
+            missing_fields = [
+                field for field in self.version_fields if LOOKUP_SEP not in field and field not in loaded_fields
+            ]
+            if loaded_fields and not is_deferred and missing_fields:
+                queryset = queryset.only(*loaded_fields, *missing_fields)
+
+        return queryset
+
+    def get_version_stamps(self, instance=None, page=None) -> list:
+        """Get the values making up the version of the instance, or of the page of the listing."""
+        if page is not None:
+            fields = (self.get_queryset().model._meta.pk.name, *self.version_fields)
+            stamps = [self.request.get_full_path()]
+            for row in page:
+                stamps.extend(row[field] if isinstance(row, dict) else getattr(row, field) for field in fields)
+            return stamps
+
+        if self.request.method in SAFE_METHODS and (stamps := self.get_loaded_version_stamps(instance)) is not None:
+            return stamps
+
+        # The preconditions of a write are checked against the committed row, not a possibly stale instance
+        queryset = self.filter_queryset(self.get_queryset())
+        return list(queryset.filter(pk=instance.pk).values_list(*self.version_fields).first() or [])
+
+    def get_loaded_version_stamps(self, instance) -> list | None:
+        """Read the version fields off the loaded instance, None when a field or a relation is not loaded."""
+        stamps = []
+        for field in self.version_fields:
+            *relations, name = field.split(LOOKUP_SEP)
+
+            obj = instance
+            for relation in relations:
+                if not obj._meta.get_field(relation).is_cached(obj):
+                    return None
+                # A missing reverse one-to-one relation raises an `AttributeError` (`RelatedObjectDoesNotExist`)
+                obj = getattr(obj, relation, None)
+                if obj is None:
+                    break
+
+            if obj is not None and name in obj.get_deferred_fields():
+                return None
+            stamps.append(None if obj is None else getattr(obj, name))
+
+        return stamps
+
+    def get_resource_version(self, instance=None, page=None) -> tuple[str, int | None]:
+        """
+        Get the ETag and the Last-Modified timestamp of the resource.
+
+        The ETag also varies with everything that changes the representation of the same rows:
+        the API version, the language and the negotiated media type.
+        """
+        stamps = self.get_version_stamps(instance=instance, page=page)
+        # HTTP dates have a resolution of one second
+        timestamps = [int(stamp.timestamp()) for stamp in stamps if hasattr(stamp, "timestamp")]
+
+        representation = [self.request.version, get_language(), getattr(self.request, "accepted_media_type", None)]
+        digest = hashlib.md5(repr([*stamps, *representation]).encode("utf-8"), usedforsecurity=False)
+
+        if page is not None:
+            # A row leaving the page does not change the latest update of the page, only the ETag tells
+            return f'"{digest.hexdigest()}"', None
+
+        return f'"{digest.hexdigest()}"', max(timestamps, default=None)
+
+    def get_conditional_response(self, instance=None, page=None):
+        """
+        Evaluate the preconditions of the request against the current version of the resource.
+
+        Args:
+            instance (Model, optional): The instance of a detail view.
+            page (list, optional): The rows of the page of a list view, already fetched.
+
+        Returns:
+            HttpResponseNotModified | None: The `304` answering a fresh `GET`, or None to carry on.
+
+        Raises:
+            PreconditionFailedAPIException: If a precondition of an unsafe request fails.
+        """
+        self.etag, self.last_modified = self.get_resource_version(instance=instance, page=page)
+
+        response = get_conditional_response(self.request, etag=self.etag, last_modified=self.last_modified)
+        if response is not None and response.status_code == 412:
+            raise exceptions.PreconditionFailedAPIException()
+
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if request.method in ("GET", "HEAD") and response.status_code in (200, 304) and getattr(self, "etag", None):
+            response["ETag"] = self.etag
+            if self.last_modified is not None:
+                response["Last-Modified"] = http_date(self.last_modified)
+
+        return response
+
+
+class CachedRetrieveMixin:
+    """
+    Serve the serialized data of the retrieved instance from a `ResponseDataCache`.
+
+    Only the full representation is cached, the requests narrowing it (e.g. `?fields=`) are serialized
+    as usual. The `X-Cache` header of the response tells whether the data came from the cache.
+
+    Usage Example:
+        ```python
+        class UserDetailsView(CachedRetrieveMixin, BaseGenericAPIView):
+            response_cache = caches.user_details_cache
+
+            def get(self, request, *args, **kwargs):
+                user = self.get_object()
+                return responses.UserDetailsAPIResponse(data=self.get_cached_data(user))
+        ```
+    """
+
+    response_cache = None
+    # The query parameters which do not change the representation (e.g. the language of `LanguageMiddleware`)
+    cache_query_params = ("lang",)
+
+    def is_cacheable_request(self) -> bool:
+        return self.response_cache is not None and set(self.request.query_params) <= set(self.cache_query_params)
+
+    def get_serialized_data(self, instance) -> dict:
+        """Serialize the instance on a cache miss, override it when the representation is not the instance."""
+        return self.get_serializer(instance=instance).data
+
+    def get_cached_data(self, instance) -> dict:
+        """Get the serialized data of the instance from the cache, serializing and caching it on a miss."""
+        if not self.is_cacheable_request():
+            return self.get_serialized_data(instance)
+
+        data = self.response_cache.get(instance.pk, version=self.request.version)
+        self.cache_status = "MISS" if data is None else "HIT"
+
+        if data is None:
+            data = dict(self.get_serialized_data(instance))
+            self.response_cache.set(instance.pk, data, version=self.request.version)
+
+        return data
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if getattr(self, "cache_status", None):
+            response["X-Cache"] = self.cache_status
+
+        return response
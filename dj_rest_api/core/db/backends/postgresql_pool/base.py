@@ -0,0 +1,160 @@
+"""
+PostgreSQL backend sharing a pool of connections between the threads of the worker.
+
+Django opens one connection per thread, and with `CONN_MAX_AGE` a thread keeps its connection between
+requests. The threaded and ASGI workers run many short-lived threads, so their connections are rarely reused.
+This backend takes the connections from a pool of the process instead, and gives them back when Django closes
+them (at the end of every request with `CONN_MAX_AGE: 0`).
+
+Usage Example:
+    ```python
+    DATABASES = {
+        "default": {
+            "ENGINE": "core.db.backends.postgresql_pool",
+            "CONN_MAX_AGE": 0,
+            "CONN_HEALTH_CHECKS": True,
+            # `min_size` connections are kept open, at most `max_size` are open at once
+            "OPTIONS": {"pool": {"min_size": 4, "max_size": 16, "timeout": 5, "check_idle_after": 30}},
+            ...
+        }
+    }
+    ```
+
+When all the connections are in use, a thread waits up to `timeout` seconds for one to be given back, then the
+request is rejected with a 503 instead of failing. With `CONN_HEALTH_CHECKS`, only the connections which sat
+idle in the pool for more than `check_idle_after` seconds are checked, the others are used without a round trip.
+"""
+
+import threading
+import time
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+from psycopg2.pool import ThreadedConnectionPool
+
+from core.api.exceptions import TooBusyAPIException
+
+
+class ConnectionPool(ThreadedConnectionPool):
+    """
+    A thread-safe pool of psycopg2 connections, opened by the given function.
+
+    Unlike `ThreadedConnectionPool.getconn()`, which raises once `max_size` connections are in use,
+    `acquire()` waits for a connection to be given back.
+    """
+
+    def __init__(self, min_size: int, max_size: int, connect):
+        self.connect = connect
+        self._slots = threading.BoundedSemaphore(max_size)
+        # When the idle connections were given back to the pool, by id
+        self._returned_at = {}
+        super().__init__(min_size, max_size)
+
+    def acquire(self, timeout: float):
+        """Take a connection from the pool, waiting up to `timeout` seconds for one to be given back"""
+        if not self._slots.acquire(timeout=timeout):
+            raise TooBusyAPIException()
+
+        try:
+            return self.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, connection, close: bool = False) -> None:
+        """Give the connection back to the pool, or close it"""
+        try:
+            self.putconn(connection, close=close)
+        finally:
+            self._slots.release()
+
+    def putconn(self, conn=None, key=None, close=False):
+        self._returned_at[id(conn)] = time.monotonic()
+        super().putconn(conn, key, close)
+
+        # The connections past `min_size` are closed rather than kept in the pool
+        if conn.closed:
+            self._returned_at.pop(id(conn), None)
+
+    def get_idle_seconds(self, connection) -> float:
+        """The seconds the connection sat in the pool, infinite if it has never been used"""
+        returned_at = self._returned_at.pop(id(connection), None)
+        return time.monotonic() - returned_at if returned_at is not None else float("inf")
+
+    def _connect(self, key=None):
+        connection = self.connect()
+        if key is not None:
+            self._used[key] = connection
+            self._rused[id(connection)] = key
+        else:
+            self._pool.append(connection)
+
+        return connection
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # The pools of the process, by database alias
+    pools = {}
+    pools_lock = threading.Lock()
+
+    @property
+    def pool_options(self) -> dict:
+        return self.settings_dict["OPTIONS"].get("pool") or {}
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    def get_pool(self, conn_params) -> ConnectionPool:
+        with self.pools_lock:
+            if self.alias not in self.pools:
+                self.pools[self.alias] = ConnectionPool(
+                    min_size=self.pool_options.get("min_size", 1),
+                    max_size=self.pool_options.get("max_size", 10),
+                    connect=lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+                )
+
+        return self.pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        if not self.pool_options:
+            return super().get_new_connection(conn_params)
+
+        # The isolation level is read from the settings when a connection is opened, the pooled ones included
+        options = self.settings_dict["OPTIONS"]
+        self.isolation_level = IsolationLevel(options.get("isolation_level", IsolationLevel.READ_COMMITTED))
+
+        pool = self.get_pool(conn_params)
+        timeout = self.pool_options.get("timeout", 5)
+        check_idle_after = self.pool_options.get("check_idle_after", 30)
+        while True:
+            connection = pool.acquire(timeout=timeout)
+            if not connection.closed and (
+                not self.settings_dict["CONN_HEALTH_CHECKS"]
+                or pool.get_idle_seconds(connection) <= check_idle_after
+                or self.ping(connection)
+            ):
+                return connection
+
+            # The server has closed the connection while it was idle in the pool
+            pool.release(connection, close=True)
+
+    def ping(self, connection) -> bool:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if not connection.autocommit:
+                connection.rollback()
+        except self.Database.Error:
+            return False
+
+        return True
+
+    def _close(self):
+        if self.connection is None or not self.pool_options:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            # An open transaction is rolled back by the pool
+            self.pools[self.alias].release(self.connection)
@@ -0,0 +1,98 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_current_routing = ContextVar("database_routing", default=None)
+
+
+class DatabaseRouting:
+    """
+    The database the reads of the current scope are sent to.
+
+    A scope reads from one replica, picked by weight when the scope starts, so all its reads see the same
+    state. Once the scope writes, its next reads are sent to the primary to read its own writes.
+    """
+
+    def __init__(self, read_alias: str = DEFAULT_DB_ALIAS):
+        self.read_alias = read_alias
+        self.has_written = False
+
+    def pin_to_primary(self) -> None:
+        self.read_alias = DEFAULT_DB_ALIAS
+        self.has_written = True
+
+    def read_from_primary(self) -> None:
+        """Send the next reads to the primary, e.g. for a client known to have written lately"""
+        self.read_alias = DEFAULT_DB_ALIAS
+
+
+def get_replica_alias() -> str:
+    """Pick one of `DATABASE_REPLICAS` according to their weights, the primary when there is no replica"""
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas:
+        return DEFAULT_DB_ALIAS
+
+    return random.choices(list(replicas), weights=list(replicas.values()))[0]
+
+
+def get_database_routing() -> DatabaseRouting | None:
+    """Get the routing of the current scope, None outside of a scope (everything goes to the primary)"""
+    return _current_routing.get()
+
+
+@contextmanager
+def routing_scope(read_from_replicas: bool):
+    """Open a new routing scope (e.g. a request) reading from a replica or from the primary"""
+    routing = DatabaseRouting(read_alias=get_replica_alias() if read_from_replicas else DEFAULT_DB_ALIAS)
+    token = _current_routing.set(routing)
+    try:
+        yield routing
+    finally:
+        _current_routing.reset(token)
+
+
+def is_reading_from_replica() -> bool:
+    """Whether the reads of the current scope are sent to a replica, which may lag behind the primary"""
+    routing = get_database_routing()
+    return routing is not None and routing.read_alias != DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    """
+    Send the reads to the read replicas, and the writes to the primary (`default`).
+
+    The reads are only sent to a replica inside a routing scope reading from replicas, i.e. the safe requests
+    (see `ReplicaRoutingMiddleware`). Everything else, such as the Celery tasks and the management commands,
+    keeps using the primary.
+
+    The replicas are listed in `DATABASE_REPLICAS` with their share of the reads:
+
+    Usage Example:
+        ```python
+        DATABASES = {"default": {...}, "replica_1": {...}, "replica_2": {...}}
+        DATABASE_REPLICAS = {"replica_1": 1, "replica_2": 2}  # replica_2 gets 2/3 of the reads
+        DATABASE_ROUTERS = ["core.db.routers.ReplicaRouter"]
+        ```
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = get_database_routing()
+        return routing.read_alias if routing is not None else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        routing = get_database_routing()
+        if routing is not None:
+            routing.pin_to_primary()
+
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replicas get the schema by replication
+        return db == DEFAULT_DB_ALIAS or db not in settings.DATABASE_REPLICAS
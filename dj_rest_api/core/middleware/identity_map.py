@@ -0,0 +1,92 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+_current_identity_map = ContextVar("identity_map", default=None)
+
+
+class IdentityMap:
+    """
+    The model instances loaded during the current request, by model and unique lookup.
+
+    Looking up an instance which is already loaded returns the same object instead of querying it again,
+    so the views, the serializers and the services of one request share their instances.
+
+    Usage Example:
+        ```python
+        identity_map = get_identity_map()
+
+        user = identity_map.get(User, "email", email) if identity_map is not None else None
+        if user is None:
+            user = User.objects.get(email=email)
+            identity_map.add(user, "email")
+        ```
+    """
+
+    def __init__(self):
+        self._instances = {}
+
+    def get(self, model, field: str, value):
+        """Get the loaded instance of the model whose unique `field` is `value`, None if it is not loaded"""
+        if field == "pk":
+            field = model._meta.pk.name
+
+        return self._instances.get((model._meta.concrete_model, field, str(value)))
+
+    def add(self, instance, *fields: str) -> None:
+        """
+        Register the instance under its primary key and the given unique fields.
+
+        The partially loaded instances (`.only()`/`.defer()`) are not registered, reusing them elsewhere
+        would cost one query per deferred field.
+        """
+        if instance.pk is None or instance.get_deferred_fields():
+            return
+
+        model = instance._meta.concrete_model
+        for field in {model._meta.pk.name, *fields} - {"pk"}:
+            self._instances[(model, field, str(getattr(instance, field)))] = instance
+
+    def discard(self, instance) -> None:
+        """Forget the instance, e.g. once it is deleted"""
+        for key, loaded_instance in list(self._instances.items()):
+            if loaded_instance is instance or (
+                key[0] is instance._meta.concrete_model and loaded_instance.pk == instance.pk
+            ):
+                del self._instances[key]
+
+
+def get_identity_map() -> IdentityMap | None:
+    """Get the identity map of the current request, None outside of a request"""
+    return _current_identity_map.get()
+
+
+@contextmanager
+def identity_map_scope():
+    """Open a new identity map for the enclosed block (e.g. a request, a task)"""
+    token = _current_identity_map.set(IdentityMap())
+    try:
+        yield _current_identity_map.get()
+    finally:
+        _current_identity_map.reset(token)
+
+
+@receiver(post_delete, dispatch_uid="identity_map_post_delete")
+def discard_deleted_instance(sender, instance, **kwargs):
+    """A deleted instance must not be returned by the next lookups of the request"""
+    identity_map = get_identity_map()
+    if identity_map is not None:
+        identity_map.discard(instance)
+
+
+class IdentityMapMiddleware:
+    """Scope an identity map to every request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with identity_map_scope():
+            return self.get_response(request)
@@ -0,0 +1,63 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.db.routers import get_database_routing, is_reading_from_replica, routing_scope
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Send the reads of the safe requests to the read replicas, except for the clients which have just written.
+
+    A replica lags behind the primary, so a client reading right after its own writes could miss them.
+    Once a request writes, its client is pinned to the primary for `REPLICA_PIN_SECONDS`. The client is
+    known by its credentials and by its user, never by its address: behind the proxies all the clients
+    share the address of the proxy, and any write would pin all of them. The users authenticated by a token are
+    only known once the view has authenticated them, the views then check their pin (see `route_authenticated_client`).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        # Only the credentials and the session users are known yet, the views check the token users
+        read_from_replicas = request.method in SAFE_METHODS and not cache.get_many(get_pin_keys(request))
+
+        with routing_scope(read_from_replicas=read_from_replicas) as routing:
+            response = self.get_response(request)
+
+        if routing.has_written:
+            # Read once the view has run, so the user authenticated by the view (e.g. by a token) is pinned
+            cache.set_many(dict.fromkeys(get_pin_keys(request), True), settings.REPLICA_PIN_SECONDS)
+
+        return response
+
+
+def get_pin_keys(request) -> list[str]:
+    """Get the cache keys pinning the client of the request to the primary, none for the anonymous clients"""
+    clients = []
+    if authorization := request.META.get("HTTP_AUTHORIZATION"):
+        clients.append(f"authorization:{authorization}")
+
+    # Authenticated by the session before the view, or by the view (e.g. a token) once it has run
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        clients.append(f"user:{user.pk}")
+
+    return [f"replica-pin:{hashlib.sha256(client.encode()).hexdigest()}" for client in clients]
+
+
+def route_authenticated_client(request) -> None:
+    """
+    Send the next reads of the request to the primary when its user, just authenticated by the view, is pinned.
+
+    A client holding several tokens (e.g. a refreshed access token) reads its writes made with any of them.
+    """
+    if is_reading_from_replica() and cache.get_many(get_pin_keys(request)):
+        get_database_routing().read_from_primary()
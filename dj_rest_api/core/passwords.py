@@ -0,0 +1,236 @@
+"""
+Password hashing off the request thread.
+
+The password hashers are designed to be slow (PBKDF2 runs ~100ms per password), so hashing in the request
+thread ties up the worker for the whole hash, and a burst of logins starves the I/O-bound requests of CPU.
+The passwords are hashed and checked in a bounded pool of processes instead, which is not bound by the GIL:
+the sync views wait for the result, the async views await it.
+
+The hashes waiting for the pool are bounded by `PASSWORD_HASHING_MAX_PENDING`. Past it, a new hash waits
+`PASSWORD_HASHING_ADMISSION_TIMEOUT` seconds for a slot, then the request is rejected with a 503 instead of
+queueing behind more work than the pool can do in time.
+
+Every worker process of the server starts its own pool, so the pools share the CPUs of the host: by default,
+each one gets the CPUs divided by the `SERVER_WORKERS` of the host.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from .api.exceptions import TooBusyAPIException
+
+logger = logging.getLogger(__name__)
+
+# Under this number of passwords, starting the work in the pool costs more than hashing them inline
+POOL_THRESHOLD = 4
+
+# The interval between two admission attempts of the async callers (in seconds)
+ADMISSION_POLL_INTERVAL = 0.01
+
+# The passwords of a batch hashed by one task, a login queued behind the batch waits for one task at most
+BATCH_CHUNK_SIZE = 8
+
+
+def _initialize_worker():
+    """Load the settings of the project in the worker process when it is not forked"""
+    import django
+
+    django.setup()
+
+
+def _make_passwords(passwords: list[str]) -> list[str]:
+    return [hashers.make_password(password) for password in passwords]
+
+
+def _verify_password(password: str, encoded: str) -> tuple[bool, bool]:
+    """Check the password in the worker process, and whether its hash must be upgraded"""
+    must_update = []
+    is_correct = hashers.check_password(password, encoded, setter=must_update.append)
+    return is_correct, bool(must_update)
+
+
+class PasswordHashingPool:
+    """
+    The pool of processes hashing the passwords, with an admission control of the pending hashes.
+
+    Usage Example:
+        ```python
+        encoded = password_hashing_pool.submit(hashers.make_password, password).result()
+
+        # From an async view
+        encoded = await password_hashing_pool.asubmit(hashers.make_password, password)
+
+        # The number of hashes submitted and not finished yet, for the monitoring
+        password_hashing_pool.stats()["queue_depth"]
+        ```
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self.pending = self.submitted = self.rejected = 0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """The pool of processes, started on first use"""
+        with self._lock:
+            if self._executor is None:
+                # The worker processes of the server share the CPUs of the host
+                host_share = max(1, (os.cpu_count() or 1) // settings.SERVER_WORKERS)
+                workers = settings.PASSWORD_HASHING_WORKERS or host_share
+                self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_initialize_worker)
+                self._slots = threading.BoundedSemaphore(settings.PASSWORD_HASHING_MAX_PENDING or workers * 4)
+
+        return self._executor
+
+    def _reject(self):
+        with self._lock:
+            self.rejected += 1
+        logger.warning("Password hashing rejected, the pool is full: %s", self.stats())
+        raise TooBusyAPIException()
+
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            self.pending -= 1
+        self._slots.release()
+
+    def _submit_admitted(self, executor: ProcessPoolExecutor, fn, *args) -> Future:
+        with self._lock:
+            self.pending += 1
+            self.submitted += 1
+
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            self._release(None)
+            raise
+
+        future.add_done_callback(self._release)
+        return future
+
+    def submit(self, fn, *args) -> Future:
+        """Submit the hashing to the pool, waiting for a slot up to the admission timeout"""
+        executor = self.executor
+        if not self._slots.acquire(timeout=settings.PASSWORD_HASHING_ADMISSION_TIMEOUT):
+            self._reject()
+
+        return self._submit_admitted(executor, fn, *args)
+
+    async def asubmit(self, fn, *args):
+        """Run the hashing in the pool and await its result, without blocking the event loop"""
+        executor = self.executor
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.PASSWORD_HASHING_ADMISSION_TIMEOUT
+        while not self._slots.acquire(blocking=False):
+            if loop.time() >= deadline:
+                self._reject()
+            await asyncio.sleep(ADMISSION_POLL_INTERVAL)
+
+        return await asyncio.wrap_future(self._submit_admitted(executor, fn, *args))
+
+    def stats(self) -> dict:
+        """Get the queue depth (the hashes submitted and not finished yet) and the counters of the process"""
+        return {
+            "queue_depth": self.pending,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+        }
+
+
+password_hashing_pool = PasswordHashingPool()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Get the pool of processes hashing the passwords, started on first use"""
+    return password_hashing_pool.executor
+
+
+def make_password(password: str) -> str:
+    """Hash the password in the pool, like `django.contrib.auth.hashers.make_password`"""
+    return password_hashing_pool.submit(hashers.make_password, password).result()
+
+
+async def amake_password(password: str) -> str:
+    return await password_hashing_pool.asubmit(hashers.make_password, password)
+
+
+def check_password(password: str, encoded: str, setter=None) -> bool:
+    """
+    Check the password in the pool, like `django.contrib.auth.hashers.check_password`.
+
+    The `setter` is called with the raw password when it is correct and its hash must be upgraded
+    (e.g. the number of iterations of the hasher has been raised).
+
+    Usage Example:
+        ```python
+        def upgrade_password(password):
+            set_password(user, password)
+            user.save(update_fields=["password"])
+
+        if not check_password(password, user.password, setter=upgrade_password):
+            raise CredentialsNotValidAPIException()
+        ```
+    """
+    is_correct, must_update = password_hashing_pool.submit(_verify_password, password, encoded).result()
+    if setter and is_correct and must_update:
+        setter(password)
+
+    return is_correct
+
+
+async def acheck_password(password: str, encoded: str, setter=None) -> bool:
+    """Check the password in the pool from an async view, the `setter` may be a coroutine function"""
+    is_correct, must_update = await password_hashing_pool.asubmit(_verify_password, password, encoded)
+    if setter and is_correct and must_update:
+        result = setter(password)
+        if inspect.isawaitable(result):
+            await result
+
+    return is_correct
+
+
+def set_password(user, password: str) -> None:
+    """Set the password of the user hashed in the pool, like `AbstractBaseUser.set_password`"""
+    user.password = make_password(password)
+    # Lets `save()` notify the password validators of the change, as `set_password()` does
+    user._password = password
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """
+    Hash many passwords in parallel, in the order they are given.
+
+    The batch goes through the admission control by chunks of `BATCH_CHUNK_SIZE` passwords, and keeps at most
+    half of the workers busy, so the logins are not queued behind the whole batch.
+
+    Usage Example:
+        ```python
+        users = [User(email=row["email"]) for row in rows]
+        for user, password in zip(users, hash_passwords([row["password"] for row in rows])):
+            user.password = password
+        ```
+    """
+    if len(passwords) < POOL_THRESHOLD:
+        return _make_passwords(passwords)
+
+    max_running = max(1, get_executor()._max_workers // 2)
+
+    encoded, running = [], deque()
+    for start in range(0, len(passwords), BATCH_CHUNK_SIZE):
+        if len(running) >= max_running:
+            encoded.extend(running.popleft().result())
+        running.append(password_hashing_pool.submit(_make_passwords, passwords[start : start + BATCH_CHUNK_SIZE]))
+
+    while running:
+        encoded.extend(running.popleft().result())
+
+    return encoded
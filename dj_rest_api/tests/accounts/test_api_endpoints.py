@@ -1,5 +1,19 @@
+import json
+
+import factory
+from apps.accounts import services
+from apps.accounts.caches import user_details_cache
+from apps.accounts.models import AdminProfile, User
+from apps.accounts.pagination import UserCursorPagination
+from apps.authentication.services import get_tokens_for_user
+from core.api.counts import CappedCount
+from core.db.routers import ReplicaRouter
+from django.contrib.auth.models import Group, Permission
 from rest_framework import status
 from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from tests.fixtures import factories
 
 
 def test_list_users_returns_all_users(api_client, users, authenticated_superuser_api_client):
@@ -13,7 +27,126 @@ def test_list_users_returns_all_users(api_client, users, authenticated_superuser
     assert response.status_code == status.HTTP_200_OK
 
     # Check that the correct number of users is returned
-    assert len(response.data) == len(users)
+    assert len(response.data["data"]) == User.objects.count()
+    assert {str(user.id) for user in users} <= {user["id"] for user in response.data["data"]}
+
+
+def test_list_users_cursor_pagination(users, authenticated_superuser_api_client):
+    url = reverse("api:accounts-api:list-create-users")
+
+    # Walk forwards through all the pages
+    pages = []
+    response = authenticated_superuser_api_client.get(path=url, data={"page_size": 2})
+    while True:
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["data"]) <= 2
+        pages.append([user["id"] for user in response.data["data"]])
+
+        if response.data["next"] is None:
+            break
+        response = authenticated_superuser_api_client.get(path=response.data["next"])
+
+    expected_ids = [
+        str(user_id) for user_id in User.objects.order_by("date_joined", "id").values_list("id", flat=True)
+    ]
+    assert [user_id for page in pages for user_id in page] == expected_ids
+
+    # Walk backwards from the last page
+    response = authenticated_superuser_api_client.get(path=response.data["previous"])
+    assert [user["id"] for user in response.data["data"]] == pages[-2]
+
+
+def test_list_users_count(users, authenticated_superuser_api_client, mocker):
+    url = reverse("api:accounts-api:list-create-users")
+
+    # Small tables are counted exactly, whatever the page size
+    response = authenticated_superuser_api_client.get(path=url, data={"page_size": 2})
+    assert response.data["count"] == str(User.objects.count())
+
+    # Beyond the cap only a lower bound is reported
+    mocker.patch.object(UserCursorPagination, "count_strategy", CappedCount(cap=2))
+    response = authenticated_superuser_api_client.get(path=url, data={"page_size": 2})
+    assert response.data["count"] == "2+"
+    assert response.data["detail"] == "2+ users have been found"
+
+
+def test_list_users_invalid_cursor(authenticated_superuser_api_client):
+    url = reverse("api:accounts-api:list-create-users")
+
+    response = authenticated_superuser_api_client.get(path=url, data={"cursor": "not-a-cursor"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # Well formed cursors holding values the ordering fields can not take
+    pagination = UserCursorPagination()
+    for position in (
+        ["notadate", "x"],
+        [{"a": 1}, "x"],
+        ["2024-01-01T00:00:00+00:00", "not-a-uuid"],
+        [None, None],
+    ):
+        cursor = pagination.encode_cursor(position)
+        response = authenticated_superuser_api_client.get(path=url, data={"cursor": cursor})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_list_users_queries_budget(one_admin_user, authenticated_superuser_api_client, django_assert_max_num_queries):
+    group = Group.objects.create(name="students")
+    students = factories.StudentUserFactory.create_batch(
+        100, email=factory.Sequence(lambda n: f"student{n}@gmail.com"), manager=one_admin_user
+    )
+    for user in students:
+        user.groups.add(group)
+
+    url = reverse("api:accounts-api:list-create-users")
+
+    # The version, the count, the page, the managers and the groups do not cost one query per user
+    with django_assert_max_num_queries(4):
+        response = authenticated_superuser_api_client.get(path=url, data={"page_size": 100})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data["data"]) == 100
+    assert any(
+        user["manager"] == one_admin_user.email and user["groups"] == ["students"] for user in response.data["data"]
+    )
+
+
+def test_list_users_sparse_fieldset(users, authenticated_superuser_api_client, django_assert_max_num_queries):
+    url = reverse("api:accounts-api:list-create-users")
+
+    # The groups are not fetched when they are not requested
+    with django_assert_max_num_queries(3):
+        response = authenticated_superuser_api_client.get(path=url, data={"fields": "id,email,type"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert all(set(user) == {"id", "email", "type"} for user in response.data["data"])
+
+    response = authenticated_superuser_api_client.get(path=url, data={"exclude": "url,profile,groups"})
+    assert all({"url", "profile", "groups"}.isdisjoint(user) and "email" in user for user in response.data["data"])
+
+
+def test_search_users(one_user, users, authenticated_superuser_api_client):
+    url = reverse("api:accounts-api:list-create-users")
+
+    # Every term must be found in the email or in the names
+    response = authenticated_superuser_api_client.get(path=url, data={"search": "djan D"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [user["id"] for user in response.data["data"]] == [str(one_user.id)]
+
+
+def test_stream_users(users, authenticated_superuser_api_client):
+    url = reverse("api:accounts-api:list-create-users")
+
+    response = authenticated_superuser_api_client.get(path=url, data={"stream": "true"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+
+    content = json.loads(b"".join(response.streaming_content))
+    assert list(content.keys()) == ["code", "detail", "data"]
+    assert len(content["data"]) == User.objects.count()
+    assert {str(user.id) for user in users} <= {user["id"] for user in content["data"]}
 
 
 def test_retrieve_user(one_user, authenticated_superuser_api_client):
@@ -34,6 +167,338 @@ def test_retrieve_user(one_user, authenticated_superuser_api_client):
     assert response.data == expected_data
 
 
+def test_retrieve_user_not_modified(one_user, authenticated_superuser_api_client):
+    url = reverse("api:accounts-api:user-details-update-destroy", args=[one_user.id])
+    response = authenticated_superuser_api_client.get(url)
+
+    etag = response["ETag"]
+    assert response.status_code == status.HTTP_200_OK
+    assert "Last-Modified" in response
+
+    # Polling an unchanged user is answered without a body
+    response = authenticated_superuser_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response["ETag"] == etag
+
+    # Any change of the user gives a new version
+    User.objects.get(id=one_user.id).save()
+    response = authenticated_superuser_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] != etag
+
+
+def test_retrieve_user_sparse_fieldset(one_user, authenticated_superuser_api_client, django_assert_num_queries):
+    url = reverse("api:accounts-api:user-details-update-destroy", args=[one_user.id])
+
+    # Neither the groups nor the profile are queried, only the user and its version
+    with django_assert_num_queries(2) as context:
+        response = authenticated_superuser_api_client.get(url, data={"fields": "id,email"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert set(response.data["data"]) == {"id", "email"}
+    assert all('"password"' not in query["sql"] for query in context.captured_queries)
+
+
+def test_retrieve_user_profile_joined(authenticated_superuser_api_client, django_assert_num_queries):
+    teacher = factories.TeacherUserFactory.create(email="teacher@gmail.com")
+    url = reverse("api:accounts-api:user-details-update-destroy", args=[teacher.id])
+
+    # The profile is joined with the user, and the version is read off them
+    with django_assert_num_queries(1):
+        response = authenticated_superuser_api_client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["data"]["profile"] == {"num_courses": 0}
+
+    # A saved profile changes the version of the details, and fails the preconditions of the writes
+    etag = response["ETag"]
+    teacher.teacher_profile.save()
+    response = authenticated_superuser_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+
+    teacher.user_permissions.add(Permission.objects.get(codename="change_user"))
+    teacher_api_client = APIClient()
+    teacher_api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(teacher)['access_token']}")
+    response = teacher_api_client.patch(url, data={"first_name": "Lost"}, HTTP_IF_MATCH=etag)
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+
+def test_retrieve_profile(authenticated_superuser_api_client, django_assert_num_queries):
+    student = factories.StudentUserFactory.create(email="student@gmail.com")
+    url = reverse("api:accounts-api:profile-details-update", args=[student.id])
+
+    # The user is loaded once, then its version and its profile
+    with django_assert_num_queries(3):
+        response = authenticated_superuser_api_client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["data"] == {"study_hours": 0}
+
+
+def test_batch_retrieve_users(users, authenticated_superuser_api_client, django_assert_max_num_queries):
+    url = reverse("api:accounts-api:batch-retrieve-users")
+    missing_id = "00000000-0000-0000-0000-000000000000"
+    ids = [str(users[2].id), missing_id, str(users[0].id), str(users[2].id)]
+
+    # One query for all the users and their profiles
+    with django_assert_max_num_queries(1):
+        response = authenticated_superuser_api_client.get(url, data={"ids": ",".join(ids)})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [user["id"] for user in response.data["data"]] == [str(users[2].id), missing_id, str(users[0].id)]
+    assert response.data["data"][1]["error"]["code"] == "not_exists"
+    assert "email" in response.data["data"][0]
+
+
+def test_batch_retrieve_users_invalid_ids(authenticated_superuser_api_client):
+    url = reverse("api:accounts-api:batch-retrieve-users")
+
+    response = authenticated_superuser_api_client.get(url, data={"ids": "not-a-uuid"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = authenticated_superuser_api_client.get(url)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_bulk_create_users(
+    authenticated_superuser_api_client, django_assert_max_num_queries, django_capture_on_commit_callbacks
+):
+    url = reverse("api:accounts-api:bulk-create-update-users")
+    payload = [
+        {
+            "email": f"bulk{index}@example.com",
+            "password": "Bulk-Pa55word!",
+            "confirm_password": "Bulk-Pa55word!",
+            "type": user_type,
+        }
+        for index, user_type in enumerate(["student", "student", "teacher", "admin"])
+    ]
+
+    # One query checks the emails, then one insert for the users and one per profile type
+    with django_assert_max_num_queries(12), django_capture_on_commit_callbacks() as callbacks:
+        response = authenticated_superuser_api_client.post(url, data=payload, format="json")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert [user["email"] for user in response.data["data"]] == [user["email"] for user in payload]
+    assert len(callbacks) == 1  # the welcome emails of the batch are sent by one task
+
+    users = User.objects.filter(email__startswith="bulk").select_related(
+        "student_profile", "teacher_profile", "admin_profile"
+    )
+    assert len(users) == 4
+    for user in users:
+        assert getattr(user, User.PROFILE_RELATIONS[user.type]) is not None
+        assert user.check_password("Bulk-Pa55word!")
+    assert User.objects.get(email="bulk3@example.com").is_superuser
+
+    # The emails are unique across the batch and the existing users
+    response = authenticated_superuser_api_client.post(url, data=payload[:1], format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # Including the soft deleted users, until they are purged
+    services.soft_delete_user(User.objects.get(email="bulk0@example.com"))
+    response = authenticated_superuser_api_client.post(url, data=payload[:1], format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # A row without a type is rejected, not created as an admin
+    row = {key: value for key, value in payload[0].items() if key != "type"}
+    response = authenticated_superuser_api_client.post(
+        url, data=[{**row, "email": "untyped@example.com"}], format="json"
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not User.all_objects.filter(email="untyped@example.com").exists()
+
+
+def test_bulk_update_users(
+    users, authenticated_superuser_api_client, django_assert_max_num_queries, django_capture_on_commit_callbacks
+):
+    url = reverse("api:accounts-api:bulk-create-update-users")
+    missing_id = "00000000-0000-0000-0000-000000000000"
+    payload = {
+        "users": [
+            {"id": str(users[0].id), "changes": {"is_active": False}},
+            {"id": str(users[1].id), "changes": {"first_name": "Bulk"}},
+            {"id": missing_id, "changes": {"is_active": False}},
+            {"id": str(users[2].id), "changes": {"email": "bulk@example.com"}},
+        ]
+    }
+    user_details_cache.set(users[0].pk, {"is_active": True}, version="1.0")
+
+    # Every distinct change-set is validated once and applied with one select and one update
+    with django_assert_max_num_queries(10), django_capture_on_commit_callbacks(execute=True):
+        response = authenticated_superuser_api_client.patch(url, data=payload, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    outcomes = response.data["data"]
+    assert [outcome["id"] for outcome in outcomes] == [user["id"] for user in payload["users"]]
+    assert [outcome.get("status") for outcome in outcomes] == ["updated", "updated", None, None]
+    assert "email" in outcomes[3]["error"]
+
+    assert not User.objects.get(id=users[0].id).is_active
+    assert User.objects.get(id=users[1].id).first_name == "Bulk"
+    assert user_details_cache.get(users[0].pk, version="1.0") is None
+
+
+def test_bulk_update_users_by_filter(users, authenticated_superuser_api_client):
+    url = reverse("api:accounts-api:bulk-create-update-users")
+    User.objects.update(is_verified=False)
+    User.objects.filter(id__in=[user.id for user in users[:2]]).update(is_verified=True)
+
+    payload = {"filter": {"is_verified": True}, "changes": {"is_active": False}}
+    response = authenticated_superuser_api_client.patch(url, data=payload, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert {outcome["id"] for outcome in response.data["data"]} == {str(user.id) for user in users[:2]}
+    assert set(User.objects.filter(is_active=False).values_list("id", flat=True)) == {user.id for user in users[:2]}
+
+    # An unknown filter is rejected instead of updating every user
+    payload = {"filter": {"unknown": True}, "changes": {"is_active": False}}
+    response = authenticated_superuser_api_client.patch(url, data=payload, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_retrieve_user_cached(one_user, authenticated_superuser_api_client, django_capture_on_commit_callbacks):
+    url = reverse("api:accounts-api:user-details-update-destroy", args=[one_user.id])
+    hits = user_details_cache.hits
+
+    response = authenticated_superuser_api_client.get(url)
+    assert response["X-Cache"] == "MISS"
+
+    response = authenticated_superuser_api_client.get(url)
+    assert response["X-Cache"] == "HIT"
+    assert user_details_cache.hits == hits + 1
+
+    # Saving the user or its profile drops the cached details
+    with django_capture_on_commit_callbacks(execute=True):
+        AdminProfile.objects.create(admin_id=one_user.id, section="math")
+
+    response = authenticated_superuser_api_client.get(url)
+    assert response["X-Cache"] == "MISS"
+
+    # A sparse fieldset is not served from the cache
+    response = authenticated_superuser_api_client.get(url, data={"fields": "id"})
+    assert "X-Cache" not in response
+
+
+def test_update_user_precondition_failed(one_user, authenticated_one_user_api_client):
+    one_user.user_permissions.add(Permission.objects.get(codename="change_user"))
+    url = reverse("api:accounts-api:user-details-update-destroy", args=[one_user.id])
+
+    # The version fetched by the client is not the current one anymore
+    response = authenticated_one_user_api_client.patch(url, data={"first_name": "Lost"}, HTTP_IF_MATCH='"stale"')
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    assert User.objects.get(id=one_user.id).first_name != "Lost"
+
+
+def test_destroy_user_soft_deleted(one_user, authenticated_one_user_api_client, django_capture_on_commit_callbacks):
+    one_user.user_permissions.add(Permission.objects.get(codename="delete_user"))
+    url = reverse("api:accounts-api:user-details-update-destroy", args=[one_user.id])
+
+    # The user is only hidden by the request, the purge is queued once the deletion is committed
+    with django_capture_on_commit_callbacks() as callbacks:
+        response = authenticated_one_user_api_client.delete(url)
+
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert len(callbacks) > 0
+    assert not User.objects.filter(id=one_user.id).exists()
+    assert User.all_objects.get(id=one_user.id).deleted_at is not None
+
+
+def test_list_users_reads_from_replica(replica_database, users, api_client, mocker):
+    url = reverse("api:accounts-api:list-create-users")
+    for user in users[:2]:
+        user.user_permissions.add(Permission.objects.get(codename="view_user"))
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(users[0])['access_token']}")
+    db_for_read = mocker.spy(ReplicaRouter, "db_for_read")
+
+    response = api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert set(db_for_read.spy_return_list) == {replica_database}
+
+    payload = {
+        "email": "replica@example.com",
+        "password": "Replica-Pa55word!",
+        "confirm_password": "Replica-Pa55word!",
+        "type": "student",
+    }
+    response = api_client.post(url, data=payload, format="json")
+    assert response.status_code == status.HTTP_201_CREATED
+
+    # The client reads its own writes from the primary for a while
+    reads = len(db_for_read.spy_return_list)
+    response = api_client.get(url)
+    assert set(db_for_read.spy_return_list[reads:]) == {"default"}
+    assert "replica@example.com" in [user["email"] for user in response.data["data"]]
+
+    # So does the same user with another token
+    same_user_client = APIClient(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(users[0])['access_token']}")
+    reads = len(db_for_read.spy_return_list)
+    assert same_user_client.get(url).status_code == status.HTTP_200_OK
+    assert set(db_for_read.spy_return_list[reads:]) == {"default"}
+
+    # The other clients behind the same address keep reading from the replica
+    other_client = APIClient(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(users[1])['access_token']}")
+    reads = len(db_for_read.spy_return_list)
+    assert other_client.get(url).status_code == status.HTTP_200_OK
+    assert set(db_for_read.spy_return_list[reads:]) == {replica_database}
+
+
+def test_retrieve_user_not_cached_from_replica_after_change(
+    replica_database, one_user, authenticated_superuser_api_client
+):
+    url = reverse("api:accounts-api:user-details-update-destroy", args=[one_user.id])
+    user_details_cache.invalidate(one_user.id)
+
+    # The replica may still serve the previous state of the user, it is not cached
+    for _ in range(2):
+        response = authenticated_superuser_api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response["X-Cache"] == "MISS"
+
+    # Once the replicas have caught up
+    user_details_cache.cache.delete_many(user_details_cache.get_keys(one_user.id))
+    authenticated_superuser_api_client.get(url)
+    assert authenticated_superuser_api_client.get(url)["X-Cache"] == "HIT"
+
+
+def test_list_users_not_modified(users, authenticated_superuser_api_client, django_assert_max_num_queries):
+    url = reverse("api:accounts-api:list-create-users")
+    etag = authenticated_superuser_api_client.get(path=url)["ETag"]
+
+    # The version is read from the rows of the page, the table is not aggregated
+    with django_assert_max_num_queries(5) as context:
+        response = authenticated_superuser_api_client.get(path=url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not any("MAX(" in query["sql"] for query in context.captured_queries)
+
+    # Another page has another version
+    response = authenticated_superuser_api_client.get(path=url, data={"page_size": 1}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+
+    # A deleted user changes the listing even if no remaining row was updated
+    users[0].delete()
+    response = authenticated_superuser_api_client.get(path=url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_list_users_not_modified_relations(users, authenticated_superuser_api_client):
+    url = reverse("api:accounts-api:list-create-users")
+    manager = factories.AdminUserFactory.create(email="manager@gmail.com")
+    User.objects.filter(pk=users[1].pk).update(manager=manager)
+
+    # The groups and the manager are rendered in the listing, changing them changes its version
+    etag = authenticated_superuser_api_client.get(path=url)["ETag"]
+    users[0].groups.add(Group.objects.create(name="reviewers"))
+    response = authenticated_superuser_api_client.get(path=url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+
+    etag = response["ETag"]
+    manager.email = "new-manager@gmail.com"
+    manager.save()
+    response = authenticated_superuser_api_client.get(path=url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+
+
 # def test_create_user(self, api_client):
 #     # Ensure that a new user can be created
 #     data = {
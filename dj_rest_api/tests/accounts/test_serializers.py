@@ -1,9 +1,20 @@
+import factory
+import pytest
+from apps.accounts import serializers
 from apps.accounts.models import Teacher, User
+from apps.accounts.serializers import UserCreateSerializer, UserListSerializer
+from core.api.exceptions import SerializerFieldsAPIException
+from django.contrib.auth.models import Group
+from django.http import QueryDict
+from django.urls import reverse
 from hypothesis import HealthCheck, given, settings
 from hypothesis import strategies as st
 from hypothesis.extra.django import from_model
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
 
-from .serializers import UserCreateSerializer, UserListSerializer
+from tests.fixtures import factories
 
 
 @settings(suppress_health_check=[HealthCheck.function_scoped_fixture])
@@ -24,6 +35,67 @@ def test_serialize_user_instances(users, rf):
     assert serializer.data
 
 
+def test_serialize_projected_users_as_instances(users, one_admin_user):
+    """Test the projection mode renders the same bytes as the model instances"""
+    group = Group.objects.create(name="students")
+    users[0].groups.add(group)
+    users[1].manager = one_admin_user
+    users[1].save()
+
+    request = Request(APIRequestFactory().get("/"))
+    queryset = User.objects.order_by("date_joined", "id")
+
+    projected = UserListSerializer(
+        UserListSerializer.setup_eager_loading(queryset), context={"request": request}, many=True
+    ).data
+    instances = [UserListSerializer(user, context={"request": request}).data for user in queryset]
+
+    assert JSONRenderer().render(projected) == JSONRenderer().render(instances)
+
+
+def test_serialize_user_details_profiles_by_type(one_admin_user, django_assert_num_queries):
+    """Test the profiles of many users are loaded with one query per user type"""
+    factories.StudentUserFactory.create_batch(3, email=factory.Sequence(lambda n: f"student{n}@gmail.com"))
+    factories.TeacherUserFactory.create(email="teacher@gmail.com")
+    users = list(User.objects.all())
+
+    # Admin, student and teacher profiles, whatever the number of users
+    with django_assert_num_queries(3):
+        data = serializers.UserDetailsSerializer(users, many=True, context={"request": None}).data
+
+    profiles = {user.type: profile for user, profile in zip(users, (user["profile"] for user in data))}
+    assert profiles[User.Type.TEACHER] == {"num_courses": 0}
+    assert profiles[User.Type.STUDENT] == {"study_hours": 0}
+
+
+def test_templated_hyperlinks_reverse_once(users, mocker):
+    """Test the urls of the listed users are formatted from one resolved template"""
+    request = Request(APIRequestFactory().get("/"))
+    serializer = UserListSerializer(users, context={"request": request}, many=True)
+
+    url_field = serializer.child.fields["url"]
+    reverse_spy = mocker.patch.object(url_field, "reverse", wraps=url_field.reverse)
+
+    urls = [user["url"] for user in serializer.data]
+
+    assert reverse_spy.call_count == 1
+    assert urls == [
+        request.build_absolute_uri(reverse("api:accounts-api:user-details-update-destroy", args=[user.id]))
+        for user in users
+    ]
+
+
+def test_fail_validate_plain_serializer():
+    """Test the plain serializers raise the field errors as an API exception"""
+    serializer = serializers.UserBatchRetrieveSerializer(data=QueryDict("ids=not-a-uuid"))
+
+    with pytest.raises(SerializerFieldsAPIException) as exc_info:
+        serializer.is_valid(raise_exception=True)
+
+    assert exc_info.value.status_code == 400
+    assert "ids" in serializer.errors
+
+
 @settings(suppress_health_check=[HealthCheck.function_scoped_fixture])
 @given(teacher=from_model(Teacher))
 def test_serialize_teacher_instance(teacher, rf):
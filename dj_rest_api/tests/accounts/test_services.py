@@ -0,0 +1,83 @@
+import pytest
+from apps.accounts import services
+from apps.accounts.caches import user_details_cache
+from apps.accounts.exceptions import UserNotFoundAPIException
+from apps.accounts.models import StudentProfile, User
+from apps.accounts.views import UserDetailsUpdateDestroyView
+from apps.authentication.models import OTPNumber
+from core.middleware.identity_map import identity_map_scope
+from django.http import Http404
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from tests.fixtures import factories
+
+
+def test_get_user_loaded_once_per_request(one_user, django_assert_num_queries):
+    """Test the lookups of one request share the loaded user"""
+    with identity_map_scope():
+        with django_assert_num_queries(1):
+            user = services.get_user_by_email(email=one_user.email)
+            assert services.get_user_by_id(user_id=one_user.id) is user
+            assert services.get_user_by_email(email=one_user.email) is user
+
+    # Another request loads the user again
+    with identity_map_scope():
+        assert services.get_user_by_id(user_id=one_user.id) is not user
+
+
+def test_get_object_from_identity_map(one_user, django_assert_num_queries):
+    """Test the views get the loaded object only while their queryset is the one of the default manager"""
+
+    class InactiveUserView(UserDetailsUpdateDestroyView):
+        def get_queryset(self):
+            return User.objects.filter(is_active=False)
+
+    def get_view(view_class):
+        request = Request(APIRequestFactory().get("/"))
+        return view_class(request=request, kwargs={"id": str(one_user.id)}, format_kwarg=None, permission_classes=[])
+
+    with identity_map_scope():
+        user = services.get_user_by_id(user_id=one_user.id)
+
+        with django_assert_num_queries(0):
+            assert get_view(UserDetailsUpdateDestroyView).get_object() is user
+
+        # The narrowed queryset is queried, the loaded user is active
+        with pytest.raises(Http404):
+            get_view(InactiveUserView).get_object()
+
+
+def test_get_deleted_user_not_found(one_user):
+    """Test a user deleted during the request is not returned by the next lookups"""
+    with identity_map_scope():
+        services.get_user_by_id(user_id=one_user.id).delete()
+
+        with pytest.raises(UserNotFoundAPIException):
+            services.get_user_by_id(user_id=one_user.id)
+
+
+def test_purge_deleted_users(users, django_capture_on_commit_callbacks):
+    """Test the soft deleted users are purged by batches with the rows referencing them"""
+    student = factories.StudentUserFactory.create(email="student@gmail.com")
+    OTPNumber.objects.create(user=student, number="123456")
+    User.objects.filter(id=users[0].id).update(manager_id=student.id)
+    managed_user = User.objects.get(id=users[0].id)
+    user_details_cache.set(managed_user.id, {"manager": student.email}, version="1.0")
+
+    with django_capture_on_commit_callbacks():
+        services.soft_delete_user(student)
+        services.soft_delete_user(users[1])
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert services.purge_deleted_users(batch_size=1) == 1
+        assert services.purge_deleted_users(batch_size=1) == 1
+        assert services.purge_deleted_users(batch_size=1) == 0
+
+    assert not User.all_objects.filter(id__in=[student.id, users[1].id]).exists()
+    assert not StudentProfile.objects.filter(student_id=student.id).exists()
+    assert not OTPNumber.objects.filter(user_id=student.id).exists()
+    # The managed user is detached like a saved one: a new version, and no stale cached details
+    assert User.objects.get(id=users[0].id).manager_id is None
+    assert User.objects.get(id=users[0].id).updated_at > managed_user.updated_at
+    assert user_details_cache.get(managed_user.id, version="1.0") is None
@@ -0,0 +1,58 @@
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+
+def test_login_queries_budget(one_user, api_client, django_assert_num_queries):
+    """Test a login reads the user once and records the refresh token"""
+    url = reverse("api:auth-api:login")
+
+    # SAVEPOINT, SELECT of the user, INSERT of the outstanding token, RELEASE SAVEPOINT
+    with django_assert_num_queries(4):
+        response = api_client.post(url, {"email": one_user.email, "password": "password"}, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert set(response.data["data"]["tokens"]) == {"refresh_token", "access_token"}
+
+
+def test_login_throttled(one_user, api_client, settings, django_assert_max_num_queries):
+    """Test the logins of an email are throttled before any work"""
+    settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {"login:email": "2/min"}}
+    url = reverse("api:auth-api:login")
+    data = {"email": one_user.email, "password": "wrong password"}
+
+    for _ in range(2):
+        assert api_client.post(url, data, format="json").status_code == status.HTTP_401_UNAUTHORIZED
+
+    # Only the savepoint of the request, rolled back
+    with django_assert_max_num_queries(3) as context:
+        response = api_client.post(url, data, format="json")
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response["Retry-After"] == "30"
+    assert not any("accounts_user" in query["sql"] for query in context.captured_queries)
+
+    # The other emails are not throttled
+    data["email"] = "other@gmail.com"
+    assert api_client.post(url, data, format="json").status_code != status.HTTP_429_TOO_MANY_REQUESTS
+
+
+def test_login_throttled_by_client_address(one_user, api_client, settings):
+    """Test a client can not reset its throttling bucket with a spoofed `X-Forwarded-For`"""
+    settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {"login": "2/min"}}
+    url = reverse("api:auth-api:login")
+    data = {"email": one_user.email, "password": "wrong password"}
+
+    # The proxy appends the address of the client to the addresses sent by the client
+    responses = [
+        api_client.post(url, data, format="json", HTTP_X_FORWARDED_FOR=f"10.0.0.{index}, 192.0.2.1")
+        for index in range(3)
+    ]
+    assert [response.status_code for response in responses] == [
+        status.HTTP_401_UNAUTHORIZED,
+        status.HTTP_401_UNAUTHORIZED,
+        status.HTTP_429_TOO_MANY_REQUESTS,
+    ]
+
+    # Another client behind the same proxy is not throttled
+    response = api_client.post(url, data, format="json", HTTP_X_FORWARDED_FOR="192.0.2.2")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,176 @@
+import time
+from datetime import timedelta
+
+import pytest
+from apps.accounts.caches import authenticated_user_cache
+from apps.accounts.exceptions import UserNotFoundAPIException
+from apps.accounts.models import User
+from apps.authentication import services as auth_services
+from apps.authentication.auth import CustomJWTAuthentication, CustomJWTTokenUserAuthentication
+from apps.authentication.blacklist import token_blacklist_index
+from apps.authentication.exceptions import CredentialsNotValidAPIException, UserNotActiveAPIException
+from apps.authentication.services import get_tokens_for_user
+from apps.authentication.tokens import CustomRefreshToken
+from core.api.exceptions import TooBusyAPIException
+from core.passwords import PasswordHashingPool, hash_passwords
+from django.contrib.auth.hashers import check_password
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+def test_authenticate_cached_user(one_user, django_assert_num_queries, django_capture_on_commit_callbacks):
+    """Test the authenticated users are cached until they change"""
+    access_token = get_tokens_for_user(one_user)["access_token"]
+    request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    authentication = CustomJWTAuthentication()
+
+    with django_assert_num_queries(1):
+        assert authentication.authenticate(request)[0] == one_user
+
+    with django_assert_num_queries(0):
+        user, _ = authentication.authenticate(request)
+        assert (user.is_active, user.type) == (one_user.is_active, one_user.type)
+    assert user == one_user
+    # Every request gets its own instance
+    assert user is not authentication.authenticate(request)[0]
+    # The password is not cached, it is loaded when needed
+    assert one_user.password not in str(authenticated_user_cache.get(one_user.id))
+    assert user.password == one_user.password
+
+    # Without the database
+    with django_assert_num_queries(0):
+        assert CustomJWTTokenUserAuthentication().authenticate(request)[0].id == str(one_user.id)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        one_user.is_active = False
+        one_user.save()
+
+    with pytest.raises(AuthenticationFailed):
+        authentication.authenticate(request)
+
+
+def test_validated_token_cached_until_expired(one_user, mocker):
+    """Test a token sent again is not validated again until it expires"""
+    raw_token = str(AccessToken.for_user(one_user)).encode()
+    authentication = CustomJWTAuthentication()
+    verify = mocker.spy(AccessToken, "verify")
+
+    validated_token = authentication.get_validated_token(raw_token)
+    assert authentication.get_validated_token(raw_token) is validated_token
+    assert verify.call_count == 1
+
+    expired_at = time.monotonic() + api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    mocker.patch("core.api.cache.time.monotonic", return_value=expired_at)
+
+    assert authentication.get_validated_token(raw_token) is not validated_token
+    assert verify.call_count == 2
+
+
+def test_check_blacklist_index(
+    one_user, settings, mocker, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    """Test only the probably blacklisted tokens are looked up in the database"""
+    token_blacklist_index.build()
+    refresh_token = CustomRefreshToken.for_user(one_user)
+
+    with django_assert_num_queries(0):
+        refresh_token.check_blacklist()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        refresh_token.blacklist()
+
+    with pytest.raises(TokenError):
+        refresh_token.check_blacklist()
+
+    # Blacklisted by another process
+    other_refresh_token = CustomRefreshToken.for_user(one_user)
+    BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(token=OutstandingToken.objects.get(jti=other_refresh_token[api_settings.JTI_CLAIM]))]
+    )
+    token_blacklist_index.notify()
+
+    # Seen once the version is polled again
+    polled_at = time.monotonic() + settings.TOKEN_BLACKLIST_INDEX_POLL_INTERVAL
+    mocker.patch("apps.authentication.blacklist.time.monotonic", return_value=polled_at)
+    with pytest.raises(TokenError):
+        other_refresh_token.check_blacklist()
+
+
+def test_prune_expired_tokens(one_user):
+    """Test only the expired tokens are pruned, with their blacklisted tokens"""
+    refresh_tokens = [CustomRefreshToken.for_user(one_user) for _ in range(4)]
+    for refresh_token in refresh_tokens[:3]:
+        refresh_token.blacklist()
+
+    expired_jtis = [refresh_token[api_settings.JTI_CLAIM] for refresh_token in refresh_tokens[1:]]
+    OutstandingToken.objects.filter(jti__in=expired_jtis).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    report = auth_services.prune_expired_tokens(batch_size=2)
+
+    assert report["outstanding_tokens"] == 3
+    assert report["blacklisted_tokens"] == 2
+    assert list(OutstandingToken.objects.values_list("jti", flat=True)) == [refresh_tokens[0][api_settings.JTI_CLAIM]]
+    assert BlacklistedToken.objects.get().token.jti == refresh_tokens[0][api_settings.JTI_CLAIM]
+
+
+def test_login_error_codes(one_user):
+    """Test the credentials are checked on the user read once"""
+    assert auth_services.login(request=None, email=one_user.email, password="password") == one_user
+
+    with pytest.raises(CredentialsNotValidAPIException):
+        auth_services.login(request=None, email=one_user.email, password="wrong password")
+
+    with pytest.raises(UserNotFoundAPIException):
+        auth_services.login(request=None, email="missing@gmail.com", password="password")
+
+    User.objects.filter(pk=one_user.pk).update(is_active=False)
+    with pytest.raises(UserNotActiveAPIException):
+        auth_services.login(request=None, email=one_user.email, password="password")
+
+
+def test_password_hashing_admission_control(settings):
+    """Test the hashes are rejected once the pool is full"""
+    settings.PASSWORD_HASHING_WORKERS = 1
+    settings.PASSWORD_HASHING_MAX_PENDING = 1
+    settings.PASSWORD_HASHING_ADMISSION_TIMEOUT = 0
+    pool = PasswordHashingPool()
+
+    future = pool.submit(time.sleep, 0.5)
+    assert pool.stats()["queue_depth"] == 1
+
+    with pytest.raises(TooBusyAPIException):
+        pool.submit(time.sleep, 0)
+
+    future.result()
+    # Waits for the callbacks releasing the slots
+    pool.executor.shutdown()
+    assert pool.stats() == {"queue_depth": 0, "submitted": 1, "rejected": 1}
+
+
+def test_hash_passwords_by_chunks(settings, mocker):
+    """Test a batch of passwords is hashed by chunks through the admission control, on half of the workers"""
+    settings.PASSWORD_HASHING_WORKERS = 2
+    pool = PasswordHashingPool()
+    mocker.patch("core.passwords.password_hashing_pool", pool)
+
+    queue_depths = []
+    submit = pool.submit
+
+    def submit_chunk(fn, *args):
+        queue_depths.append(pool.pending)
+        return submit(fn, *args)
+
+    mocker.patch.object(pool, "submit", side_effect=submit_chunk)
+
+    raw_passwords = [f"password-{index}" for index in range(20)]
+    encoded_passwords = hash_passwords(raw_passwords)
+
+    assert all(check_password(raw, encoded) for raw, encoded in zip(raw_passwords, encoded_passwords))
+    # The chunks run one at a time, the other worker is left to the logins
+    assert len(queue_depths) == 3
+    assert max(queue_depths) <= 1
+    pool.executor.shutdown()
@@ -1,2 +1,3 @@
 from .accounts import *
 from .clients import *
+from .databases import *
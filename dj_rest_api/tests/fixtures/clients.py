@@ -1,4 +1,5 @@
 import pytest
+from apps.authentication.services import get_tokens_for_user
 from rest_framework import test
 from rest_framework.test import force_authenticate
 
@@ -17,7 +18,7 @@ def authenticated_superuser_api_client(api_client):
         first_name="test_", last_name="authenticated_user", password="password123", is_superuser=True
     )
 
-    access_token = user.get_tokens()["access"]
+    access_token = get_tokens_for_user(user)["access_token"]
 
     # Create an API client and force authentication for the user
     api_client.force_authenticate(user=user, token=access_token)
@@ -26,8 +27,8 @@ def authenticated_superuser_api_client(api_client):
 
 
 @pytest.fixture
-def authenticated_one_user_api_client(one_user):
-    access_token = one_user.get_tokens()["access"]
+def authenticated_one_user_api_client(one_user, api_client):
+    access_token = get_tokens_for_user(one_user)["access_token"]
 
     # Create an API client and force authentication for the user
     api_client.force_authenticate(user=one_user, token=access_token)
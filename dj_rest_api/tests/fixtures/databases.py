@@ -0,0 +1,21 @@
+import pytest
+from django.core.cache import cache
+from django.db import connections
+
+
+@pytest.fixture
+def replica_database(settings):
+    """
+    Fixture to route the reads to the `replica` alias.
+
+    The replica is served by the connection of the primary, so it sees the rows of the test transaction.
+    """
+    settings.DATABASE_REPLICAS = {"replica": 1}
+    cache.clear()  # drop the pins of the previous tests
+
+    replica_connection = connections["replica"]
+    connections["replica"] = connections["default"]
+
+    yield "replica"
+
+    connections["replica"] = replica_connection
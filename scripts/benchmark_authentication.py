@@ -0,0 +1,70 @@
+"""
+Measure the latency of the JWT authentication of one request, with and without the validated tokens cache.
+
+The same access token is authenticated again and again, as the clients do with all their requests. The user is
+served by the cache of the authenticated users in both runs, so only the validation of the token differs.
+
+    ```bash
+    python scripts/benchmark_authentication.py --iterations 100000
+    ```
+"""
+
+import argparse
+import os
+import sys
+import timeit
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "dj_rest_api"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+
+def benchmark(iterations: int) -> dict:
+    from apps.accounts.caches import authenticated_user_cache
+    from apps.accounts.models import User
+    from apps.authentication import auth
+    from core.api.cache import LocalLRUCache
+    from django.test import RequestFactory
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    user = User(id=uuid.uuid4(), email="benchmark@gmail.com", is_active=True)
+    authenticated_user_cache.set(user)
+
+    request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    authentication = auth.CustomJWTAuthentication()
+
+    def measure() -> float:
+        authentication.authenticate(request)  # warm up
+        return min(timeit.repeat(lambda: authentication.authenticate(request), number=iterations, repeat=5))
+
+    cached = measure()
+
+    validated_token_cache = auth.validated_token_cache
+    auth.validated_token_cache = LocalLRUCache(max_size=0, timeout=0)
+    try:
+        uncached = measure()
+    finally:
+        auth.validated_token_cache = validated_token_cache
+
+    return {
+        "without cache (µs)": uncached / iterations * 1_000_000,
+        "with cache (µs)": cached / iterations * 1_000_000,
+        "speedup": uncached / cached,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=10000, help="The number of authentications per measure")
+    args = parser.parse_args()
+
+    import django
+
+    django.setup()
+
+    results = benchmark(args.iterations)
+
+    print()
+    for name, value in results.items():
+        print(f"{name:>20}: {value:.2f}")
@@ -0,0 +1,69 @@
+"""
+Measure the requests per second of an endpoint of a running server.
+
+Run it against the same endpoint before and after a change of the database settings (e.g. `CONN_MAX_AGE`,
+the pooled backend, the non atomic views) to compare their throughput. The settings can be switched without
+editing them, through the `DREST_SETTINGS_` environment variables read by the settings:
+
+    ```bash
+    # Before: a new connection and a transaction for every request
+    DREST_SETTINGS_DATABASES='{"default": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": false}}' make run-server
+    python scripts/benchmark_requests.py http://localhost/api/accounts/ --token <access token>
+
+    # After: the persistent connections checked before their reuse
+    make run-server
+    python scripts/benchmark_requests.py http://localhost/api/accounts/ --token <access token>
+    ```
+"""
+
+import argparse
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def send_request(url: str, token: str | None) -> float:
+    """Send one request and return its latency in seconds"""
+    request = urllib.request.Request(url)
+    if token:
+        request.add_header("Authorization", f"Bearer {token}")
+
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+
+    return time.perf_counter() - start
+
+
+def benchmark(url: str, token: str | None, requests: int, concurrency: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        send_request(url, token)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(lambda _: send_request(url, token), range(requests)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests/sec": requests / elapsed,
+        "mean (ms)": statistics.mean(latencies) * 1000,
+        "p50 (ms)": latencies[len(latencies) // 2] * 1000,
+        "p95 (ms)": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("url", help="The url of the endpoint, e.g. http://localhost/api/accounts/")
+    parser.add_argument("--token", help="An access token sent as `Authorization: Bearer <token>`")
+    parser.add_argument("--requests", type=int, default=1000, help="The number of measured requests")
+    parser.add_argument("--concurrency", type=int, default=8, help="The number of clients sending requests at once")
+    parser.add_argument("--warmup", type=int, default=20, help="The number of requests sent before measuring")
+    args = parser.parse_args()
+
+    results = benchmark(args.url, args.token, args.requests, args.concurrency, args.warmup)
+
+    print()
+    for name, value in results.items():
+        print(f"{name:>14}: {value:.2f}")